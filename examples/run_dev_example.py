@@ -57,33 +57,41 @@ async def simulate_data_processing():
     log.info("\n--- Stage: Raw Data (Multiple Symbols) ---")
     raw_data_store = {} # Store fetched data for later use
 
-    for symbol in symbols:
-        log.info(f"\nProcessing Raw Data for: {symbol}")
-        raw_path = build_raw_data_path(source, symbol, start, end, interval)
+    raw_paths = {symbol: build_raw_data_path(source, symbol, start, end, interval) for symbol in symbols}
+    for symbol, raw_path in raw_paths.items():
         log.info(f"Built Raw Path ({symbol}): {raw_path}")
 
-        # 1a. Check cache (expect MISS)
-        log.info(f"Getting raw data for {symbol} (expecting MISS)...")
-        raw_data = await app_cache.get_data(raw_path)
-        if raw_data is None:
-            log.info(f"Raw data MISS confirmed ({symbol}). Simulating fetch...")
-            await asyncio.sleep(0.4) # Simulate network delay
-            # Simulate slightly different data per symbol
-            simulated_raw_data = {
-                "price_data": [170.0 + (ord(symbol[0]) % 5), 171.5, 171.0],
-                "volume": [1e6, 1.1e6, 0.9e6],
-                "fetch_time": time.time()
-            }
-            await app_cache.add_or_update_data(raw_path, simulated_raw_data)
-            log.info(f"Raw data ADDED to cache ({symbol}).")
-            raw_data_store[symbol] = simulated_raw_data # Store fetched data
-        else:
+    async def fetch_raw_data(symbol):
+        await asyncio.sleep(0.4) # Simulate network delay
+        # Simulate slightly different data per symbol
+        return {
+            "price_data": [170.0 + (ord(symbol[0]) % 5), 171.5, 171.0],
+            "volume": [1e6, 1.1e6, 0.9e6],
+            "fetch_time": time.time()
+        }
+
+    # 1a. Check cache for all symbols at once (expect MISS)
+    log.info(f"Getting raw data for {symbols} (expecting MISS)...")
+    raw_results = await app_cache.get_many(list(raw_paths.values()))
+    missing_symbols = [symbol for symbol, data in zip(symbols, raw_results) if data is None]
+    for symbol, data in zip(symbols, raw_results):
+        if data is not None:
             log.error(f"UNEXPECTED HIT for raw data ({symbol})!")
 
-        # 1b. Check cache again (expect HIT)
-        log.info(f"Getting raw data for {symbol} again (expecting HIT)...")
-        raw_data_again = await app_cache.get_data(raw_path)
-        if raw_data_again is not None:
+    # Fetch every missing symbol concurrently, then store them in one batch
+    log.info(f"Raw data MISS confirmed ({missing_symbols}). Simulating fetch...")
+    fetched = await asyncio.gather(*(fetch_raw_data(symbol) for symbol in missing_symbols))
+    await app_cache.add_or_update_many(
+        (raw_paths[symbol], data) for symbol, data in zip(missing_symbols, fetched)
+    )
+    raw_data_store.update(zip(missing_symbols, fetched)) # Store fetched data
+    log.info(f"Raw data ADDED to cache ({missing_symbols}).")
+
+    # 1b. Check cache again (expect HIT)
+    log.info(f"Getting raw data for {symbols} again (expecting HIT)...")
+    raw_results_again = await app_cache.get_many(list(raw_paths.values()))
+    for symbol, data in zip(symbols, raw_results_again):
+        if data is not None:
             log.info(f"Raw data HIT confirmed ({symbol}).")
         else:
             log.error(f"ERROR: Expected cache hit for raw path ({symbol}) but got miss!")
@@ -1,11 +1,38 @@
-import collections
+import array
+import asyncio
+import inspect
 import logging
-from typing import Any, List, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Iterable, List, Dict, Mapping, Optional, Set, Tuple
 
+from .node import DependencyNode
 from .tree import DependencyTree
 
 log = logging.getLogger(__name__)
 
+# Upper bound on memoized path keys, so one-off paths can't grow it without limit
+_PATH_KEY_CACHE_SIZE = 4096
+
+# Layout of the per-path counters: each path id owns _PATH_STAT_WIDTH
+# adjacent slots in DataCache._counters, at these offsets
+_CHECKED, _HIT, _MISSED, _ADDED, _INVALIDATED = range(5)
+_PATH_STAT_WIDTH = 5
+
+# Called as listener(op, path, node) after each mutation: ("add", path, node)
+# per stored item, ("invalidate", path, None) per invalidate call and
+# ("reset_stats", [], None) when stats are reset. Listeners may be coroutine
+# functions; their coroutines for one operation are awaited concurrently
+CacheListener = Callable[[str, List[str], Optional[DependencyNode]], Optional[Awaitable[None]]]
+
+# Per-path stats dictionary names, mapped to their counter offset
+_PATH_STAT_FIELDS = {
+    "paths_checked": _CHECKED,
+    "paths_hit": _HIT,
+    "paths_missed": _MISSED,
+    "paths_added": _ADDED,
+    "paths_invalidated": _INVALIDATED,
+}
+
 class DataCache:
     """
     Provides a user-friendly facade for interacting with the DependencyTree cache.
@@ -19,35 +46,174 @@ class DataCache:
         """
         self.dependency_tree = DependencyTree()
         self._stats: Dict[str, Any] = self._init_stats()
+        # Bumped on every per-path counter update and never reset, so clients
+        # can ask get_stats for what changed since a version they saw
+        self._stats_version: int = 0
+        self._stats_reset_version: int = 0 # _stats_version at the last reset
+        self._init_path_counters()
+        self._path_key_cache: Dict[Tuple[str, ...], str] = {}
+        # Futures for get_or_compute calls currently producing data, by path key
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Last rendered /tree payload and the (tree version, node structure
+        # version) it reflects; kept by the visualizer, stale as soon as
+        # either moves on
+        self.tree_json: Optional[bytes] = None
+        self.tree_json_key: Tuple[int, int] = (-1, -1)
+        # Nodes found by the visualizer's path lookups, valid only while the
+        # key (tree version, node structure version) is unchanged
+        self.node_lookups: Dict[Tuple[str, ...], DependencyNode] = {}
+        self.node_lookups_key: Tuple[int, int] = (-1, -1)
+        self._listeners: List[CacheListener] = []
+        # Tasks running async listeners for reset_stats, which cannot await them
+        self._listener_tasks: Set[asyncio.Task] = set()
         log.info("DataCache initialized.")
 
+    @property
+    def version(self) -> int:
+        """Gets the dependency tree's version, which changes on every write."""
+        return self.dependency_tree.version
+
+    @property
+    def stats_version(self) -> int:
+        """Gets the stats version, which changes on every counter update."""
+        return self._stats_version
+
+    def add_listener(self, listener: CacheListener) -> None:
+        """
+        Registers a callback invoked after every cache mutation.
+
+        Args:
+            listener: Called as listener(op, path, node); see CacheListener.
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: CacheListener) -> None:
+        """
+        Unregisters a callback added with add_listener.
+
+        Args:
+            listener: The callback to remove; unknown callbacks are ignored.
+        """
+        try:
+            self._listeners.remove(listener)
+        except ValueError:
+            pass
+
+    def _notify(
+        self, op: str, path: List[str], node: Optional[DependencyNode], pending: List[Awaitable[None]]
+    ) -> None:
+        """
+        Calls every listener for one mutation, logging (not raising) their errors.
+
+        Args:
+            op: The mutation, as passed to listeners.
+            path: The mutated path.
+            node: The stored node for "add", otherwise None.
+            pending: Receives the awaitables returned by async listeners, for
+                     the caller to pass to _settle.
+        """
+        for listener in self._listeners:
+            try:
+                result = listener(op, path, node)
+                if inspect.isawaitable(result):
+                    pending.append(result)
+            except Exception as e:
+                log.exception("Cache listener %r failed on %s for path %s: %s", listener, op, path, e)
+
+    async def _settle(self, pending: List[Awaitable[None]]) -> None:
+        """
+        Awaits async listener calls concurrently, logging (not raising) their errors.
+
+        One slow listener (e.g. one doing I/O) then delays the operation by
+        its own latency rather than adding to every other listener's.
+
+        Args:
+            pending: Awaitables collected by _notify.
+        """
+        results = await asyncio.gather(*pending, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                log.error("Async cache listener failed: %s", result, exc_info=result)
+
+    def _settle_later(self, pending: List[Awaitable[None]]) -> None:
+        """
+        Runs _settle in a task, for synchronous callers that cannot await it.
+
+        Outside a running event loop the async listener calls are skipped.
+
+        Args:
+            pending: Awaitables collected by _notify.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            log.debug("No running event loop; skipping %d async cache listener calls.", len(pending))
+            for awaitable in pending:
+                close = getattr(awaitable, "close", None)
+                if close is not None:
+                    close() # Avoid "coroutine was never awaited" warnings
+            return
+        task = loop.create_task(self._settle(pending))
+        self._listener_tasks.add(task)
+        task.add_done_callback(self._listener_tasks.discard)
+
     def _init_stats(self) -> Dict[str, Any]:
-        """Initializes or resets the statistics dictionary."""
+        """Initializes or resets the global statistics counters."""
         return {
             "gets": 0,
             "hits": 0,
             "misses": 0,
             "adds": 0,
             "invalidations": 0,
-            # Using defaultdict for easier updates
-            "paths_checked": collections.defaultdict(int),
-            "paths_hit": collections.defaultdict(int),
-            "paths_missed": collections.defaultdict(int),
-            "paths_added": collections.defaultdict(int),
-            "paths_invalidated": collections.defaultdict(int)
         }
 
+    def _init_path_counters(self) -> None:
+        """Initializes or resets the per-path counters and the stats snapshot."""
+        # Path key -> path id; the id's counters start at id * _PATH_STAT_WIDTH
+        self._path_ids: Dict[str, int] = {}
+        self._counters: array.array = array.array('Q')
+        # Path id -> _stats_version of the path's latest counter update
+        self._path_modified: array.array = array.array('Q')
+        # Snapshot returned by get_stats, and the _stats_version it reflects
+        self._stats_view: Optional[Mapping[str, Any]] = None
+        self._stats_view_version: int = -1
+
+    def _path_offset(self, path_key: str) -> int:
+        """
+        Returns the first counter index for a path key, allocating it on first use.
+
+        Every caller goes on to update the path's counters, so the path is
+        also marked as modified at a new stats version here.
+        """
+        self._stats_version += 1
+        path_id = self._path_ids.get(path_key)
+        if path_id is None:
+            path_id = self._path_ids[path_key] = len(self._path_ids)
+            self._counters.extend((0,) * _PATH_STAT_WIDTH)
+            self._path_modified.append(0)
+        self._path_modified[path_id] = self._stats_version
+        return path_id * _PATH_STAT_WIDTH
+
     def _path_to_key(self, path: List[str]) -> str:
         """
         Converts a list path to a single string key suitable for stats dictionaries.
 
+        Results are memoized per path tuple, since the same paths are typically
+        queried over and over by a running pipeline.
+
         Args:
             path: A list of strings representing the path in the dependency tree.
 
         Returns:
             A single string key (e.g., "raw_data/nse/symbol"). Returns "ROOT" for empty path.
         """
-        return "/".join(path) if path else "ROOT"
+        path_tuple = tuple(path)
+        key = self._path_key_cache.get(path_tuple)
+        if key is None:
+            key = "/".join(path) if path else "ROOT"
+            if len(self._path_key_cache) < _PATH_KEY_CACHE_SIZE:
+                self._path_key_cache[path_tuple] = key
+        return key
 
     async def get_data(self, path: List[str]) -> Any:
         """
@@ -60,29 +226,91 @@ class DataCache:
             The cached data if found and not None, otherwise None.
         """
         path_key = self._path_to_key(path)
-        log.debug(f"Attempting to get data for path: {path} (key: {path_key})")
-        self._stats["gets"] += 1
-        self._stats["paths_checked"][path_key] += 1
+        log.debug("Attempting to get data for path: %s (key: %s)", path, path_key)
+        stats = self._stats
+        counters = self._counters
+        offset = self._path_offset(path_key)
+        stats["gets"] += 1
+        counters[offset + _CHECKED] += 1
 
         try:
-            data = await self.dependency_tree.get_data(path)
-            if data is not None:
-                self._stats["hits"] += 1
-                self._stats["paths_hit"][path_key] += 1
-                log.info(f"Cache HIT for path: {path}")
-                return data
-            else:
-                self._stats["misses"] += 1
-                self._stats["paths_missed"][path_key] += 1
-                log.info(f"Cache MISS for path: {path}")
-                return None
+            return await self._get_data_fast(path, offset)
         except Exception as e:
             # Log unexpected errors during retrieval
-            log.exception(f"Error retrieving data from cache for path {path}: {e}")
-            self._stats["misses"] += 1 # Count as miss if error occurs
-            self._stats["paths_missed"][path_key] += 1
+            log.exception("Error retrieving data from cache for path %s: %s", path, e)
+            stats["misses"] += 1 # Count as miss if error occurs
+            counters[offset + _MISSED] += 1
             return None
 
+    async def _get_data_fast(self, path: List[str], offset: int) -> Any:
+        """
+        Looks up data and records the hit or miss, without any error handling.
+
+        Args:
+            path: A list of strings representing the path in the dependency tree.
+            offset: The path's first index in the per-path counter array.
+
+        Returns:
+            The cached data if found and not None, otherwise None.
+        """
+        data = self.dependency_tree.get_data(path)
+        if data is not None: # Hits are the common case in a warm cache
+            self._stats["hits"] += 1
+            self._counters[offset + _HIT] += 1
+            log.info("Cache HIT for path: %s", path)
+            return data
+        self._stats["misses"] += 1
+        self._counters[offset + _MISSED] += 1
+        log.info("Cache MISS for path: %s", path)
+        return None
+
+    async def get_or_compute(
+        self,
+        path: List[str],
+        compute: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """
+        Returns cached data for a path, computing and caching it on a miss.
+
+        Concurrent callers that miss on the same path share a single call to
+        compute: the first caller runs it, the others await its result (or
+        its exception) instead of fetching the same data again.
+
+        Args:
+            path: A list of strings representing the path in the dependency tree.
+            compute: A zero-argument coroutine function producing the data.
+
+        Returns:
+            The cached or freshly computed data.
+        """
+        data = await self.get_data(path)
+        if data is not None:
+            return data
+
+        path_key = self._path_to_key(path)
+        inflight = self._inflight.get(path_key)
+        if inflight is not None:
+            log.debug("Awaiting in-flight computation for path: %s", path)
+            # Shield so one waiter being cancelled doesn't cancel the shared future
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[path_key] = future
+        try:
+            data = await compute()
+            await self.add_or_update_data(path, data)
+            future.set_result(data)
+            return data
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Mark retrieved; it is re-raised to this caller below
+            raise
+        finally:
+            del self._inflight[path_key]
+
     async def add_or_update_data(self, path: List[str], data: Any) -> None:
         """
         Adds or updates cached data at a specific path in the DependencyTree, updating stats.
@@ -92,64 +320,172 @@ class DataCache:
             data: The data artifact to cache.
         """
         path_key = self._path_to_key(path)
-        log.debug(f"Attempting to add/update data for path: {path} (key: {path_key})")
+        log.debug("Attempting to add/update data for path: %s (key: %s)", path, path_key)
         self._stats["adds"] += 1
-        self._stats["paths_added"][path_key] += 1
+        self._counters[self._path_offset(path_key) + _ADDED] += 1
 
         try:
-            await self.dependency_tree.add_or_update_node(path, data)
-            log.info(f"Data added/updated successfully for path: {path}")
+            node = await self.dependency_tree.add_or_update_node(path, data)
+            log.info("Data added/updated successfully for path: %s", path)
+            if node is not None and self._listeners:
+                pending: List[Awaitable[None]] = []
+                self._notify("add", path, node, pending)
+                if pending:
+                    await self._settle(pending)
         except Exception as e:
             # Log unexpected errors during add/update
-            log.exception(f"Error adding/updating data in cache for path {path}: {e}")
+            log.exception("Error adding/updating data in cache for path %s: %s", path, e)
             # Decrement add count if it failed? Or leave as an attempted add?
             # Let's leave it, as the intent was to add.
 
+    async def get_many(self, paths: Iterable[List[str]]) -> List[Any]:
+        """
+        Retrieves cached data for several paths concurrently, updating stats.
+
+        Args:
+            paths: The paths to look up.
+
+        Returns:
+            The cached data (or None on a miss) for each path, in input order.
+        """
+        return await asyncio.gather(*(self.get_data(path) for path in paths))
+
+    async def add_or_update_many(self, items: Iterable[Tuple[List[str], Any]]) -> None:
+        """
+        Adds or updates cached data for several paths, updating stats.
+
+        Stats are credited per item, while the tree inserts the whole batch
+        under one writer lock acquisition.
+
+        Args:
+            items: (path, data) pairs to store.
+        """
+        items = list(items)
+        for path, _ in items:
+            self._stats["adds"] += 1
+            self._counters[self._path_offset(self._path_to_key(path)) + _ADDED] += 1
+
+        try:
+            nodes = await self.dependency_tree.add_or_update_many(items)
+            log.info("Batch of %d items added/updated successfully.", len(items))
+            if self._listeners:
+                pending: List[Awaitable[None]] = []
+                for node in nodes:
+                    self._notify("add", node.get_path(), node, pending)
+                if pending:
+                    # Every item's async listener calls run together
+                    await self._settle(pending)
+        except Exception as e:
+            log.exception("Error adding/updating a batch of %d items in cache: %s", len(items), e)
+
     async def invalidate(self, path: List[str]) -> None:
         """
         Invalidates cached data at a specific path and its descendants, updating stats.
 
+        The global invalidations counter counts calls, while the per-path
+        counters are credited for the target and every descendant it took
+        down with it. Async listeners are awaited together, not one by one.
+
         Args:
             path: A list of strings representing the path to invalidate.
         """
         path_key = self._path_to_key(path)
-        log.debug(f"Attempting to invalidate path: {path} (key: {path_key})")
+        log.debug("Attempting to invalidate path: %s (key: %s)", path, path_key)
         self._stats["invalidations"] += 1
-        self._stats["paths_invalidated"][path_key] += 1
+        self._counters[self._path_offset(path_key) + _INVALIDATED] += 1
 
         try:
-            await self.dependency_tree.invalidate(path)
-            log.info(f"Cache invalidated successfully for path: {path}")
+            invalidated_paths = await self.dependency_tree.invalidate(path)
+            # The first entry is the target itself, already credited above
+            for descendant_path in invalidated_paths[1:]:
+                descendant_offset = self._path_offset(self._path_to_key(descendant_path))
+                self._counters[descendant_offset + _INVALIDATED] += 1
+            log.info("Cache invalidated successfully for path: %s", path)
+            if self._listeners:
+                pending: List[Awaitable[None]] = []
+                self._notify("invalidate", path, None, pending)
+                if pending:
+                    await self._settle(pending)
         except Exception as e:
             # Log unexpected errors during invalidation
-            log.exception(f"Error invalidating cache for path {path}: {e}")
+            log.exception("Error invalidating cache for path %s: %s", path, e)
             # Decrement invalidation count? Let's leave it.
 
-    def get_stats(self) -> Dict[str, Any]:
+    def get_stats(self, since: Optional[int] = None) -> Mapping[str, Any]:
         """
-        Returns a copy of the current cache statistics.
+        Returns a read-only snapshot of the current cache statistics.
 
-        Converts defaultdicts to regular dicts for easier JSON serialization if needed.
+        The per-path dictionaries (paths_checked, paths_hit, ...) are rebuilt
+        from the counter array, listing only paths with a non-zero count, and
+        hit_ratio (hits as a percentage of gets, None before any get) is
+        derived alongside them. The full snapshot is reused until a counter
+        changes, so frequent polling of unchanged stats costs nothing. Callers
+        needing a mutable copy can call dict() on the result (or its paths_*
+        entries).
+
+        Args:
+            since: A stats version from an earlier snapshot's "version" entry.
+                   If given, the paths_* dictionaries only list paths whose
+                   counters changed after it. If stats were reset after it,
+                   or it is newer than this cache has reached (it came from
+                   another instance, e.g. before a server restart), the
+                   full snapshot is returned instead.
 
         Returns:
-            A dictionary containing cache statistics.
-        """
-        # Create a deep copy to avoid external modification? For stats, shallow might be ok.
-        stats_copy = self._stats.copy()
-        # Convert defaultdicts to regular dicts for cleaner output/serialization
-        for key in [
-            "paths_checked", "paths_hit", "paths_missed",
-            "paths_added", "paths_invalidated"
-        ]:
-            stats_copy[key] = dict(stats_copy[key])
-        return stats_copy
+            A read-only mapping containing cache statistics.
+        """
+        if since is not None and self._stats_reset_version <= since <= self._stats_version:
+            return self._build_stats(since)
+        if self._stats_view is None or self._stats_view_version != self._stats_version:
+            self._stats_view = self._build_stats(0)
+            self._stats_view_version = self._stats_version
+        return self._stats_view
+
+    def _build_stats(self, since: int) -> Mapping[str, Any]:
+        """
+        Builds a stats snapshot covering the paths modified after since.
+
+        Args:
+            since: A stats version; 0 covers every path.
+
+        Returns:
+            A read-only mapping containing cache statistics.
+        """
+        stats_copy: Dict[str, Any] = dict(self._stats)
+        gets = stats_copy["gets"]
+        stats_copy["hit_ratio"] = stats_copy["hits"] / gets * 100.0 if gets else None
+        stats_copy["version"] = self._stats_version
+        counters = self._counters
+        modified = self._path_modified
+        path_ids = [
+            (path_key, path_id) for path_key, path_id in self._path_ids.items()
+            if modified[path_id] > since
+        ]
+        for stats_key, field_offset in _PATH_STAT_FIELDS.items():
+            stats_copy[stats_key] = MappingProxyType({
+                path_key: count
+                for path_key, path_id in path_ids
+                if (count := counters[path_id * _PATH_STAT_WIDTH + field_offset])
+            })
+        return MappingProxyType(stats_copy)
 
     def reset_stats(self) -> None:
         """
         Resets all cache statistics to their initial state.
+
+        Async listeners are run in a task when called on the event loop, and
+        skipped otherwise.
         """
         log.info("Resetting cache statistics.")
         self._stats = self._init_stats()
+        self._init_path_counters()
+        self._stats_version += 1
+        self._stats_reset_version = self._stats_version
+        if self._listeners:
+            pending: List[Awaitable[None]] = []
+            self._notify("reset_stats", [], None, pending)
+            if pending:
+                self._settle_later(pending)
 
     def __repr__(self) -> str:
         """Provides a string representation of the DataCache."""
@@ -1,13 +1,111 @@
-import asyncio
 import hashlib
-import json
+import itertools
 import logging
+import sys
+import time
+from collections import deque
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import orjson
 
 # Set up basic logging
 log = logging.getLogger(__name__)
 
+# Process-wide write counter; every node write takes the next value
+_VERSION = itertools.count()
+
+_PRIMITIVE_TYPES = (str, int, float, bool, type(None))
+
+_ORJSON_HASH_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _serialize_orjson(data: Any) -> bytes:
+    """Serializes data with orjson, falling back to repr() for the odd failing value."""
+    try:
+        # orjson emits bytes directly; default=str covers types it can't handle
+        return orjson.dumps(data, default=str, option=_ORJSON_HASH_OPTIONS)
+    except TypeError: # orjson.JSONEncodeError is a TypeError
+        return _serialize_repr(data)
+
+
+def _serialize_repr(data: Any) -> bytes:
+    """Serializes data via repr(); only stable if the type's repr is."""
+    return repr(data).encode('utf-8')
+
+
+# Serializer chosen for each payload type that reaches _hash_fallback. Payload
+# types are stable for a running pipeline, so the choice is made once per type.
+_FALLBACK_SERIALIZERS: Dict[type, Callable[[Any], bytes]] = {}
+
+
+def _hash_fallback(data: Any, hasher: Any) -> None:
+    """Feeds data of an unrecognised type into the hasher via orjson, then repr()."""
+    data_type = type(data)
+    serializer = _FALLBACK_SERIALIZERS.get(data_type)
+    if serializer is not None:
+        hasher.update(serializer(data))
+        return
+
+    # First value of this type: probe orjson once and remember what works
+    try:
+        data_bytes = orjson.dumps(data, default=str, option=_ORJSON_HASH_OPTIONS)
+        _FALLBACK_SERIALIZERS[data_type] = _serialize_orjson
+    except TypeError: # orjson.JSONEncodeError is a TypeError
+        # Fallback for types JSON can't handle directly
+        data_bytes = _serialize_repr(data)
+        _FALLBACK_SERIALIZERS[data_type] = _serialize_repr
+        if log.isEnabledFor(logging.WARNING):
+            log.warning("Using repr() for hashing data of type %s. Ensure repr is stable.", data_type)
+    hasher.update(data_bytes)
+
+
+def _hash_dispatch(data: Any, hasher: Any) -> None:
+    """
+    Feeds a stable byte representation of data into hasher.
+
+    Dispatches on type so the common cache payloads never go through a
+    serialize-then-hash round trip. numpy arrays are detected by duck typing
+    to keep numpy an optional dependency.
+
+    Args:
+        data: The value to hash.
+        hasher: A hashlib-style object exposing update().
+    """
+    if isinstance(data, _PRIMITIVE_TYPES):
+        hasher.update(repr(data).encode('utf-8'))
+    elif isinstance(data, dict):
+        try:
+            keys = sorted(data)
+        except TypeError:
+            # Mixed, non-comparable key types
+            _hash_fallback(data, hasher)
+            return
+        hasher.update(b'{')
+        for key in keys:
+            _hash_dispatch(key, hasher)
+            hasher.update(b':')
+            _hash_dispatch(data[key], hasher)
+            hasher.update(b',')
+        hasher.update(b'}')
+    elif isinstance(data, (list, tuple)):
+        hasher.update(b'[')
+        for item in data:
+            _hash_dispatch(item, hasher)
+            hasher.update(b',')
+        hasher.update(b']')
+    elif (
+        hasattr(data, 'tobytes') and hasattr(data, 'shape')
+        and getattr(getattr(data, 'dtype', None), 'hasobject', True) is False
+    ):
+        # numpy-style array of plain values: hash the raw buffer
+        hasher.update(data.dtype.str.encode('utf-8'))
+        hasher.update(repr(data.shape).encode('utf-8'))
+        hasher.update(data.tobytes())  # Always a C-ordered copy
+    else:
+        _hash_fallback(data, hasher)
+
+
 class DependencyNode:
     """
     Represents a node in the dependency cache tree.
@@ -16,6 +114,16 @@ class DependencyNode:
     and a hash of its data for change detection.
     """
 
+    # One node exists per cache path, so avoid a per-instance __dict__
+    __slots__ = (
+        "identifier", "_data", "parent", "children", "_data_hash",
+        "_modified_at", "_timestamp", "_version", "serialized",
+    )
+
+    # Process-wide count of changes that detached or replaced children, so a
+    # tree can tell whether node references it cached may have gone stale
+    structure_version: int = 0
+
     def __init__(
         self,
         identifier: str,
@@ -33,13 +141,19 @@ class DependencyNode:
         if not isinstance(identifier, str) or not identifier:
             raise ValueError("Node identifier must be a non-empty string.")
 
-        self.identifier: str = identifier
+        # Interned: the same segments repeat across many nodes, and interned
+        # keys take the pointer-equality fast path in children lookups
+        self.identifier: str = sys.intern(identifier)
         self._data: Any = data
         self.parent: Optional['DependencyNode'] = parent
         self.children: Dict[str, 'DependencyNode'] = {}
-        self.timestamp: datetime = datetime.now()
-        self._data_hash: Optional[str] = self._generate_hash(data) if data is not None else None
-        log.debug(f"Node '{self.identifier}' created.")
+        self._modified_at: float = time.time()
+        self._timestamp: Optional[datetime] = None # Materialized lazily from _modified_at
+        self._version: int = next(_VERSION)
+        self._data_hash: Optional[int] = self._generate_hash(data) if data is not None else None
+        # Memoized API serialization of this subtree (see discard_serialized)
+        self.serialized: Optional[Dict[str, Any]] = None
+        log.debug("Node '%s' created.", self.identifier)
 
     @property
     def data(self) -> Any:
@@ -51,43 +165,75 @@ class DependencyNode:
         """Sets the data for this node and updates the hash and timestamp."""
         self._data = value
         self._data_hash = self._generate_hash(value) if value is not None else None
-        self.timestamp = datetime.now()
-        log.debug(f"Data set for node '{self.identifier}', hash: {self._data_hash}")
+        self._touch()
+        log.debug("Data set for node '%s', hash: %s", self.identifier, self._data_hash)
 
     @property
-    def data_hash(self) -> Optional[str]:
-        """Gets the hash of the data stored in this node."""
+    def timestamp(self) -> datetime:
+        """
+        Gets the time of the node's last write.
+
+        Writes only record a float from time.time(); the datetime is built
+        on first read and reused until the next write.
+        """
+        if self._timestamp is None:
+            self._timestamp = datetime.fromtimestamp(self._modified_at)
+        return self._timestamp
+
+    @property
+    def version(self) -> int:
+        """Gets a process-wide monotonic counter value taken at the node's last write."""
+        return self._version
+
+    def _touch(self, modified_at: Optional[float] = None) -> None:
+        """Records a write to this node without building a datetime."""
+        self._modified_at = time.time() if modified_at is None else modified_at
+        self._timestamp = None
+        self._version = next(_VERSION)
+        self.discard_serialized()
+
+    def discard_serialized(self) -> None:
+        """
+        Drops the memoized serialization of this node and its ancestors.
+
+        A node's serialization embeds those of its descendants, so it is only
+        ever memoized while theirs are; conversely, once a node holds none,
+        neither do its ancestors, and the upward walk stops there.
+        """
+        node = self
+        while node is not None and node.serialized is not None:
+            node.serialized = None
+            node = node.parent
+
+    @property
+    def data_hash(self) -> Optional[int]:
+        """Gets the 64-bit hash of the data stored in this node, as an int."""
         return self._data_hash
 
-    def _generate_hash(self, data_to_hash: Any) -> str:
+    def _generate_hash(self, data_to_hash: Any) -> int:
         """
-        Generates a stable MD5 hash for the node's data.
+        Generates a stable BLAKE2b hash for the node's data.
 
-        Uses JSON serialization with a fallback to repr() for complex types.
-        Note: This is a basic implementation. For complex objects like DataFrames
-        or custom classes without stable repr, a more robust hashing strategy
-        (e.g., considering specific attributes, using pickle with care, or
-        custom serializers) might be needed.
+        Common payloads (primitives, dicts, lists/tuples and numpy-style arrays)
+        are streamed straight into the hasher by _hash_dispatch; anything else
+        falls back to orjson serialization, then repr().
+        Note: For complex objects like DataFrames or custom classes without a
+        stable repr, a more robust hashing strategy (e.g., considering specific
+        attributes or custom serializers) might be needed.
 
         Args:
             data_to_hash: The data to generate a hash for.
 
         Returns:
-            A string representing the MD5 hash.
+            The 64-bit BLAKE2b digest as an int, which is cheap to store and compare.
         """
-        try:
-            # Use default=str for common non-serializable types like datetime
-            data_str = json.dumps(data_to_hash, sort_keys=True, default=str)
-        except (TypeError, OverflowError):
-            # Fallback for types JSON can't handle directly
-            data_str = repr(data_to_hash)
-            log.warning(
-                f"Using repr() for hashing data of type {type(data_to_hash)} "
-                f"in node '{self.identifier}'. Ensure repr is stable."
-            )
-        return hashlib.md5(data_str.encode('utf-8')).hexdigest()
-
-    async def add_child(self, child_node: 'DependencyNode') -> None:
+        # The hash only drives change detection, so cryptographic strength is
+        # irrelevant; BLAKE2b is considerably faster than MD5 in CPython.
+        hasher = hashlib.blake2b(digest_size=8)
+        _hash_dispatch(data_to_hash, hasher)
+        return int.from_bytes(hasher.digest(), 'big')
+
+    def add_child(self, child_node: 'DependencyNode') -> None:
         """
         Adds a child node to this node.
 
@@ -98,14 +244,17 @@ class DependencyNode:
         """
         if not isinstance(child_node, DependencyNode):
             raise TypeError("Child must be an instance of DependencyNode.")
-        if child_node.identifier in self.children:
-            log.warning(f"Overwriting existing child with identifier '{child_node.identifier}' in node '{self.identifier}'.")
+        existing = self.children.get(child_node.identifier)
+        if existing is not None and existing is not child_node:
+            log.warning("Overwriting existing child with identifier '%s' in node '%s'.", child_node.identifier, self.identifier)
+            DependencyNode.structure_version += 1
 
         child_node.parent = self
         self.children[child_node.identifier] = child_node
-        log.debug(f"Child node '{child_node.identifier}' added to parent '{self.identifier}'.")
+        self.discard_serialized()
+        log.debug("Child node '%s' added to parent '%s'.", child_node.identifier, self.identifier)
 
-    async def get_child(self, identifier: str) -> Optional['DependencyNode']:
+    def get_child(self, identifier: str) -> Optional['DependencyNode']:
         """
         Gets a child node by its identifier.
 
@@ -117,71 +266,121 @@ class DependencyNode:
         """
         return self.children.get(identifier)
 
-    async def remove_child(self, identifier: str) -> None:
+    def remove_child(self, identifier: str) -> None:
         """
         Removes a child node by its identifier.
 
-        The removed child node and its descendants are not automatically invalidated;
-        call invalidate_tree on the child first if needed.
+        The removed child and its descendants are disposed (see dispose), so
+        their payloads are released even if something still references them.
 
         Args:
             identifier: The string identifier of the child node to remove.
         """
         if identifier in self.children:
             child_to_remove = self.children.pop(identifier)
-            child_to_remove.parent = None # Dereference parent
-            log.debug(f"Child node '{identifier}' removed from parent '{self.identifier}'.")
+            DependencyNode.structure_version += 1
+            child_to_remove.dispose()
+            self.discard_serialized()
+            log.debug("Child node '%s' removed from parent '%s'.", identifier, self.identifier)
         else:
-            log.warning(f"Attempted to remove non-existent child '{identifier}' from node '{self.identifier}'.")
+            log.warning("Attempted to remove non-existent child '%s' from node '%s'.", identifier, self.identifier)
 
-    async def clear_children(self) -> None:
+    def clear_children(self) -> None:
         """
         Removes all child nodes from this node.
 
-        This method recursively invalidates the entire subtree rooted at each child
+        This method invalidates the entire subtree rooted at each child
         before removing the child reference.
         """
         children_to_clear = list(self.children.values())
         self.children.clear()
-        log.debug(f"Clearing {len(children_to_clear)} children from node '{self.identifier}'.")
+        DependencyNode.structure_version += 1
+        self.discard_serialized()
+        log.debug("Clearing %s children from node '%s'.", len(children_to_clear), self.identifier)
         # Invalidate children *after* clearing the dictionary to avoid potential
         # modification during iteration issues if invalidation triggers other actions.
-        await asyncio.gather(*(child.invalidate_tree() for child in children_to_clear))
-        log.debug(f"Finished invalidating children of node '{self.identifier}'.")
+        for child in children_to_clear:
+            child.parent = None
+            child._invalidate_tree_sync()
+        log.debug("Finished invalidating children of node '%s'.", self.identifier)
+
+    def _invalidate_tree_sync(self) -> None:
+        """
+        Invalidates this node and all its descendants in a single iterative pass.
 
+        Invalidation is pure in-memory work, so the subtree is walked
+        breadth-first over a deque instead of spawning a coroutine per node.
+        Descendants are detached from their parents, so the discarded subtree
+        holds no parent/child reference cycles.
+        """
+        modified_at = time.time()
+        DependencyNode.structure_version += 1
+        pending = deque([self])
+        while pending:
+            node = pending.popleft()
+            node._data = None
+            node._data_hash = None
+            node._touch(modified_at)
+            if node is not self:
+                node.parent = None
+            pending.extend(node.children.values())
+            node.children.clear()
+
+    def dispose(self) -> None:
+        """
+        Releases the payload and all links of this node and its descendants.
+
+        Intended for nodes that have left the tree: a stale external reference
+        to the subtree (e.g. held by a visualizer) then no longer pins its data.
+        """
+        DependencyNode.structure_version += 1
+        pending = [self]
+        while pending:
+            node = pending.pop()
+            pending.extend(node.children.values())
+            node._data = None
+            node._data_hash = None
+            node.parent = None
+            node.children = {}
+            node.serialized = None
 
     async def invalidate_tree(self) -> None:
         """
         Invalidates this node and recursively invalidates all its descendants.
 
         Invalidation means setting the node's data and hash to None and updating
-        its timestamp. It then clears all children, triggering their invalidation.
+        its timestamp. All children are cleared, invalidating them as well.
         """
-        log.debug(f"Invalidating node '{self.identifier}' and its descendants.")
-        self._data = None
-        self._data_hash = None
-        self.timestamp = datetime.now()
-        # Clear children, which will recursively call invalidate_tree on them
-        await self.clear_children()
-        log.debug(f"Node '{self.identifier}' invalidation complete.")
+        log.debug("Invalidating node '%s' and its descendants.", self.identifier)
+        self._invalidate_tree_sync()
+        log.debug("Node '%s' invalidation complete.", self.identifier)
 
 
     def __repr__(self) -> str:
         """Provides a string representation of the node."""
         parent_id = f"'{self.parent.identifier}'" if self.parent else "None"
+        short_hash = f"{self._data_hash:016x}"[:7] if self._data_hash is not None else None
         return (
             f"DependencyNode(identifier='{self.identifier}', "
             f"has_data={self._data is not None}, "
-            f"hash='{self._data_hash[:7] if self._data_hash else None}...', "
+            f"hash='{short_hash}...', "
             f"children={len(self.children)}, "
             f"parent={parent_id})"
         )
 
     def get_path(self) -> List[str]:
         """Returns the list of identifiers from the root to this node."""
-        path = []
+        return list(self._path_deque())
+
+    def get_path_tuple(self) -> Tuple[str, ...]:
+        """Returns the path from the root to this node as a hashable tuple."""
+        return tuple(self._path_deque())
+
+    def _path_deque(self) -> deque:
+        """Collects identifiers in root -> node order by prepending while walking up."""
+        path = deque()
         current = self
         while current is not None and current.identifier != "root": # Stop at root
-            path.append(current.identifier)
+            path.appendleft(current.identifier)
             current = current.parent
-        return path[::-1] # Reverse to get root -> node order
\ No newline at end of file
+        return path
\ No newline at end of file
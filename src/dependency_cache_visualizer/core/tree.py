@@ -1,31 +1,146 @@
 import asyncio
+import functools
+import itertools
 import logging
-from typing import Any, List, Optional
+from collections import deque
+from typing import Any, Callable, Iterable, List, Optional, Tuple
 
 from .node import DependencyNode
 
 log = logging.getLogger(__name__)
 
+# Process-wide counter shared by all trees, so versions never repeat across
+# instances (e.g. when the visualizer is pointed at a fresh cache)
+_TREE_VERSION = itertools.count()
+
+def _paths_from_snapshot(path: List[str], snapshot: List[Tuple[str, int]]) -> List[List[str]]:
+    """
+    Expands a subtree snapshot into full paths, outside any lock.
+
+    Args:
+        path: The path of the snapshot's first node.
+        snapshot: (identifier, parent index) pairs from _snapshot_subtree_unsafe.
+
+    Returns:
+        One path per snapshot entry, in the same order; empty if snapshot is.
+    """
+    if not snapshot:
+        return []
+    paths = [list(path)]
+    for identifier, parent_index in snapshot[1:]:
+        paths.append(paths[parent_index] + [identifier])
+    return paths
+
+class _RWLock:
+    """
+    A minimal asyncio reader-writer lock.
+
+    Any number of readers may hold the lock together; a writer holds it
+    alone. Waiting writers block new readers, so a steady stream of reads
+    cannot starve a write. Use as `async with lock.reader_lock:` or
+    `async with lock.writer_lock:`.
+    """
+
+    def __init__(self):
+        """Initializes an unlocked RWLock."""
+        self._cond: asyncio.Condition = asyncio.Condition()
+        self._readers: int = 0
+        self._writer: bool = False
+        self._writers_waiting: int = 0
+        self.reader_lock = _RWLockSide(self._acquire_read, self._release_read)
+        self.writer_lock = _RWLockSide(self._acquire_write, self._release_write)
+
+    async def _acquire_read(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: not self._writer and not self._writers_waiting)
+            self._readers += 1
+
+    # Releases update the state before their first await, so cancelling a
+    # release (e.g. while it waits for the condition's lock) cannot leave the
+    # lock held; the wakeup itself is shielded and always runs to completion
+
+    async def _release_read(self) -> None:
+        self._readers -= 1
+        if not self._readers:
+            await asyncio.shield(self._notify_all())
+
+    async def _acquire_write(self) -> None:
+        async with self._cond:
+            self._writers_waiting += 1
+            try:
+                await self._cond.wait_for(lambda: not self._writer and not self._readers)
+            finally:
+                self._writers_waiting -= 1
+            self._writer = True
+
+    async def _release_write(self) -> None:
+        self._writer = False
+        await asyncio.shield(self._notify_all())
+
+    async def _notify_all(self) -> None:
+        async with self._cond:
+            self._cond.notify_all()
+
+class _RWLockSide:
+    """Async context manager for one side (reader or writer) of an _RWLock."""
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    async def __aenter__(self) -> None:
+        await self._acquire()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._release()
+
 class DependencyTree:
     """
     Manages the overall dependency cache tree structure.
 
     Provides methods to add, retrieve, and invalidate nodes within the tree
-    using paths (lists of identifiers). Handles concurrency using an asyncio Lock.
+    using paths (lists of identifiers). Writes take the writer side of a
+    reader-writer lock, subtree reads share its reader side, and single-node
+    reads are synchronous and lock-free.
     """
 
     def __init__(self):
         """Initializes the DependencyTree with a root node."""
         self.root: DependencyNode = DependencyNode("root")
-        self._lock: asyncio.Lock = asyncio.Lock()
+        self._lock: _RWLock = _RWLock()
+        # Last path walked and the nodes along it (root first), so lookups of
+        # sibling paths can skip their shared prefix
+        self._last_path: List[str] = []
+        self._last_stack: List[DependencyNode] = [self.root]
+        # DependencyNode.structure_version when the cached walk was taken;
+        # nodes detached since then (by the tree or through the public node
+        # methods) may be on the cached stack, so it is dropped on mismatch
+        self._walk_structure_version: int = DependencyNode.structure_version
+        self.node_count: int = 1 # Including the root
+        self._version: int = next(_TREE_VERSION)
         log.info("DependencyTree initialized with root node.")
 
+    @property
+    def version(self) -> int:
+        """
+        Gets a value that changes on every write (add, update or invalidation).
+
+        Lets readers such as the visualizer tell cheaply whether anything in
+        the tree changed since they last looked.
+        """
+        return self._version
+
     async def add_or_update_node(self, path: List[str], data: Any) -> Optional[DependencyNode]:
         """
         Adds or updates a node at the specified path with the given data.
 
-        Creates intermediate nodes if they don't exist. Acquires a lock
-        to ensure thread-safe modification of the tree.
+        Creates intermediate nodes if they don't exist. The path is walked
+        before the writer lock is taken; under the lock the walk is redone
+        from the root (creating missing nodes) only if it missed or the node
+        found no longer chains up to the root, so updates of existing nodes
+        hold the lock just for that check and the data assignment.
 
         Args:
             path: A list of string identifiers representing the path from the root.
@@ -38,34 +153,145 @@ class DependencyTree:
             log.warning("Attempted to add/update node with empty path.")
             return None
 
-        async with self._lock:
-            log.debug(f"Acquired lock to add/update node at path: {path}")
-            current_node = self.root
-            for identifier in path:
-                child = await current_node.get_child(identifier)
-                if child is None:
-                    log.debug(f"Creating new node '{identifier}' under '{current_node.identifier}'.")
-                    new_node = DependencyNode(identifier=identifier, parent=current_node)
-                    await current_node.add_child(new_node)
-                    current_node = new_node
-                else:
-                    current_node = child
+        # Optimistic lock-free walk; only structural changes can invalidate it
+        current_node = self._walk(path)
+
+        async with self._lock.writer_lock:
+            log.debug("Acquired lock to add/update node at path: %s", path)
+            if current_node is None:
+                current_node = self._walk(path, create=True)
+            elif not self._is_attached(current_node):
+                # Detached while waiting (or behind the walk cache's back)
+                self._reset_walk()
+                current_node = self._walk(path, create=True)
 
             # Now current_node is the target node
-            log.info(f"Setting data for node at path: {path}")
+            log.info("Setting data for node at path: %s", path)
             current_node.data = data # Setter handles hash and timestamp
-            log.info(f"Data SET for node '{current_node.identifier}' at path {path}. Data type: {type(current_node.data)}, Data is None: {current_node.data is None}")
-            log.debug(f"Node object after data set: {current_node}")
-            log.debug(f"Releasing lock after add/update at path: {path}")
+            self._version = next(_TREE_VERSION)
+            if log.isEnabledFor(logging.INFO):
+                # The arguments themselves touch the data property twice
+                log.info(
+                    "Data SET for node '%s' at path %s. Data type: %s, Data is None: %s",
+                    current_node.identifier, path, type(current_node.data), current_node.data is None,
+                )
+            log.debug("Node object after data set: %s", current_node)
+            log.debug("Releasing lock after add/update at path: %s", path)
             return current_node
 
 
-    async def _get_node_unsafe(self, path: List[str]) -> Optional[DependencyNode]:
+    async def add_or_update_many(
+        self, items: Iterable[Tuple[List[str], Any]]
+    ) -> List[DependencyNode]:
+        """
+        Adds or updates several nodes under a single writer lock acquisition.
+
+        Items are inserted in path order, so consecutive paths share long
+        prefixes and each walk only covers the identifiers that differ from
+        the previous one. The sort is stable, so when a path appears more
+        than once its last item wins, as with sequential calls.
+
+        Args:
+            items: (path, data) pairs to store. Empty paths are skipped.
+
+        Returns:
+            The nodes that were added or updated, in path order.
+        """
+        # Keyed on tuples, since lists and tuples don't compare with each other
+        ordered = sorted(items, key=lambda item: tuple(item[0]))
+        nodes = []
+        async with self._lock.writer_lock:
+            log.debug("Acquired lock to add/update %d nodes.", len(ordered))
+            for path, data in ordered:
+                if not path:
+                    log.warning("Skipping batch item with empty path.")
+                    continue
+                node = self._walk(path, create=True)
+                node.data = data # Setter handles hash and timestamp
+                nodes.append(node)
+            self._version = next(_TREE_VERSION)
+        log.info("Batch set data for %d nodes.", len(nodes))
+        return nodes
+
+    def _walk(self, path: List[str], create: bool = False) -> Optional[DependencyNode]:
+        """
+        Follows path down from the root, resuming from the last walked path.
+
+        The identifiers path shares with the previous walk are skipped by
+        starting from the cached node at the end of that prefix, so runs of
+        sibling lookups under a long common prefix cost one dict lookup per
+        differing identifier. This is the traversal core shared by every tree
+        lookup, so it is kept free of logging.
+
+        Args:
+            path: The identifiers to follow.
+            create: Create missing nodes along the way instead of failing.
+
+        Returns:
+            The node at the end of the path, or None if a segment is missing
+            and create is False.
+        """
+        if self._walk_structure_version != DependencyNode.structure_version:
+            # Nodes were detached somewhere; the cached stack may hold them
+            self._reset_walk()
+
+        last_path = self._last_path
+        limit = min(len(path), len(last_path))
+        common = 0
+        while common < limit and path[common] == last_path[common]:
+            common += 1
+
+        stack = self._last_stack[:common + 1]
+        node = stack[-1]
+        for identifier in path[common:]:
+            child = node.children.get(identifier)
+            if child is None:
+                if not create:
+                    return None
+                # The miss above already proves the slot is free, so skip
+                # add_child's type/overwrite checks and write the dict directly
+                child = DependencyNode(identifier=identifier, parent=node)
+                node.children[child.identifier] = child
+                node.discard_serialized()
+                self.node_count += 1
+            node = child
+            stack.append(node)
+
+        self._last_path = list(path)
+        self._last_stack = stack
+        return node
+
+    def _reset_walk(self) -> None:
+        """Drops the cached walk, so the next one starts from the root."""
+        self._walk_structure_version = DependencyNode.structure_version
+        self._last_path = []
+        self._last_stack = [self.root]
+
+    def _is_attached(self, node: DependencyNode) -> bool:
+        """
+        Checks that node is reachable from the root through children links.
+
+        Args:
+            node: The node to check.
+
+        Returns:
+            True if every ancestor, up to the root, still holds the node's
+            branch under its identifier.
+        """
+        root = self.root
+        while node is not root:
+            parent = node.parent
+            if parent is None or parent.children.get(node.identifier) is not node:
+                return False
+            node = parent
+        return True
+
+    def _get_node_unsafe(self, path: List[str]) -> Optional[DependencyNode]:
         """
         Retrieves a node from the specified path WITHOUT acquiring the lock.
 
-        Assumes the caller holds the lock. Used internally by methods that
-        already manage the lock.
+        Used internally by methods that already hold the lock, and by the
+        lock-free read methods below.
 
         Args:
             path: A list of string identifiers representing the path from the root.
@@ -76,22 +302,18 @@ class DependencyTree:
         if not path:
             return self.root # Return root if path is empty
 
-        current_node = self.root
-        for identifier in path:
-            # Use direct dictionary access assuming lock is held
-            child = current_node.children.get(identifier)
-            if child is None:
-                log.debug(f"Node not found at path segment '{identifier}' within path {path} (unsafe get).")
-                return None
-            current_node = child
-        log.debug(f"Node found at path {path} (unsafe get).")
-        return current_node
+        node = self._walk(path)
+        if node is None:
+            log.debug("Node not found at path %s (unsafe get).", path)
+        return node
 
-    async def get_node(self, path: List[str]) -> Optional[DependencyNode]:
+    def get_node(self, path: List[str]) -> Optional[DependencyNode]:
         """
         Retrieves a node from the specified path.
 
-        Acquires a lock for safe concurrent access.
+        Synchronous and lock-free: the walk is a series of dict lookups with
+        no await points, so it cannot interleave with a writer on the same
+        event loop.
 
         Args:
             path: A list of string identifiers representing the path from the root.
@@ -99,47 +321,96 @@ class DependencyTree:
         Returns:
             The DependencyNode at the specified path if found, otherwise None.
         """
-        async with self._lock:
-            log.debug(f"Acquired lock to get node at path: {path}")
-            node = await self._get_node_unsafe(path)
-            log.debug(f"Releasing lock after get node at path: {path}")
-            return node
+        if not path:
+            return self.root # Never reassigned, so no walk is needed
+        return self._get_node_unsafe(path)
+
+    def _snapshot_subtree_unsafe(self, node: DependencyNode) -> List[Tuple[str, int]]:
+        """
+        Records the topology of a subtree WITHOUT acquiring the lock.
+
+        Only (identifier, parent index) pairs are gathered, in breadth-first
+        order, so the caller's lock is held for one pass over the children
+        dicts; the path lists are built afterwards by _paths_from_snapshot.
+
+        Args:
+            node: The root node of the subtree.
+
+        Returns:
+            One entry per node, starting with node itself (parent index -1).
+        """
+        snapshot = [(node.identifier, -1)]
+        queue = deque([(node, 0)])
+        while queue:
+            current_node, index = queue.popleft()
+            for identifier, child in current_node.children.items():
+                queue.append((child, len(snapshot)))
+                snapshot.append((identifier, index))
+        return snapshot
+
+    async def collect_subtree_paths(self, path: List[str]) -> List[List[str]]:
+        """
+        Lists the paths of the node at path and all its descendants.
+
+        Shares the reader lock with other subtree reads.
+
+        Args:
+            path: A list of string identifiers representing the path from the root.
+
+        Returns:
+            A list of paths in the subtree, or an empty list if path does not exist.
+        """
+        async with self._lock.reader_lock:
+            node = self._get_node_unsafe(path)
+            snapshot = self._snapshot_subtree_unsafe(node) if node else []
+        return _paths_from_snapshot(path, snapshot)
 
-    async def invalidate(self, path: List[str]) -> None:
+    async def invalidate(self, path: List[str]) -> List[List[str]]:
         """
         Invalidates a node and its entire subtree at the specified path.
 
-        Acquires a lock to ensure safe modification during invalidation.
+        Acquires the writer lock to ensure safe modification during invalidation.
         If the path does not exist, this operation does nothing.
 
         Args:
             path: A list of string identifiers representing the path to the node
                   to invalidate.
+
+        Returns:
+            The paths of every invalidated node (the target first). The
+            topology is captured under the same lock as the invalidation
+            itself; the path lists are built after it is released.
         """
         if not path:
             log.warning("Attempted to invalidate with empty path. Invalidating root is not typical, skipping.")
             # Or potentially invalidate the whole tree if desired: await self.root.invalidate_tree()
-            return
+            return []
 
-        async with self._lock:
-            log.debug(f"Acquired lock to invalidate node at path: {path}")
-            node_to_invalidate = await self._get_node_unsafe(path)
+        async with self._lock.writer_lock:
+            log.debug("Acquired lock to invalidate node at path: %s", path)
+            node_to_invalidate = self._get_node_unsafe(path)
+            snapshot = []
             if node_to_invalidate:
-                log.info(f"Invalidating subtree starting at path: {path}")
+                log.info("Invalidating subtree starting at path: %s", path)
+                snapshot = self._snapshot_subtree_unsafe(node_to_invalidate)
+                self.node_count -= len(snapshot) - 1 # Descendants are dropped
+                # Detaches the descendants, bumping DependencyNode.structure_version
                 await node_to_invalidate.invalidate_tree()
+                self._version = next(_TREE_VERSION)
                 # Optional: Remove the invalidated node itself from its parent?
                 # if node_to_invalidate.parent:
-                #     await node_to_invalidate.parent.remove_child(node_to_invalidate.identifier)
+                #     node_to_invalidate.parent.remove_child(node_to_invalidate.identifier)
             else:
-                log.warning(f"Attempted to invalidate non-existent path: {path}")
-            log.debug(f"Releasing lock after invalidate at path: {path}")
+                log.warning("Attempted to invalidate non-existent path: %s", path)
+            log.debug("Releasing lock after invalidate at path: %s", path)
+        return _paths_from_snapshot(path, snapshot)
 
 
-    async def get_data(self, path: List[str]) -> Any:
+    def get_data(self, path: List[str]) -> Any:
         """
         Convenience method to get data directly from a node at the specified path.
 
-        Acquires a lock for safe concurrent access.
+        Synchronous and lock-free, like get_node.
 
         Args:
             path: A list of string identifiers representing the path from the root.
@@ -147,7 +418,9 @@ class DependencyTree:
         Returns:
             The data stored at the node if the node exists and has data, otherwise None.
         """
-        node = await self.get_node(path)
+        if not path:
+            return self.root.data
+        node = self._get_node_unsafe(path)
         return node.data if node else None
 
     def __repr__(self) -> str:
@@ -157,11 +430,32 @@ class DependencyTree:
         # For safety, could acquire lock, but might be overkill for repr.
         return f"DependencyTree(root_children={len(self.root.children)})"
 
+    async def read_in_thread(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a CPU-heavy read of the tree on a worker thread.
+
+        The reader lock is held until func returns, so no writer can change
+        the tree under the thread while other readers and the event loop
+        carry on.
+
+        Args:
+            func: The function to run; it must only read the tree.
+            *args: Arguments for func.
+
+        Returns:
+            Whatever func returns.
+        """
+        async with self._lock.reader_lock:
+            # run_in_executor rather than asyncio.to_thread, which needs 3.9+
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, functools.partial(func, *args))
+
     async def get_subtree_nodes(self, start_path: List[str] = None) -> List[DependencyNode]:
         """
         Retrieves all nodes in the subtree starting from the given path (or root).
 
-        Uses a breadth-first search approach. Acquires lock for safety.
+        Uses a breadth-first search approach. Holds the reader lock, so
+        concurrent subtree reads do not block each other.
 
         Args:
             start_path: The path to the root of the subtree. If None or empty, starts from the tree root.
@@ -169,18 +463,14 @@ class DependencyTree:
         Returns:
             A list of all DependencyNode objects in the specified subtree.
         """
-        nodes = []
-        queue = asyncio.Queue()
-
-        async with self._lock:
-            start_node = await self._get_node_unsafe(start_path or [])
-            if start_node:
-                await queue.put(start_node)
-
-            while not queue.empty():
-                current_node = await queue.get()
-                nodes.append(current_node)
-                for child in current_node.children.values():
-                    await queue.put(child)
+        async with self._lock.reader_lock:
+            start_node = self._get_node_unsafe(start_path or [])
+            nodes = [start_node] if start_node else []
+
+            # The result list doubles as the BFS queue: a list iterator picks
+            # up items appended during iteration, so each node's children are
+            # queued behind it without a separate deque or per-node pops
+            for current_node in nodes:
+                nodes.extend(current_node.children.values())
 
         return nodes
\ No newline at end of file
@@ -1,27 +1,50 @@
+import functools
 import hashlib
 import re
 import logging
+import string
+import sys
 from typing import List, Dict, Any, Optional, Union
 from datetime import date, datetime
 
 log = logging.getLogger(__name__)
 
+# Sanitization patterns, compiled once for the path-building hot path
+_NON_WORD_RE = re.compile(r'\W+')
+_WHITESPACE_RE = re.compile(r'\s+')
+_NON_WORD_DASH_RE = re.compile(r'[^\w\-]+')
+
+# Translation table deleting ASCII word characters: a symbol it maps to ''
+# contains nothing \W+ would replace
+_DELETE_ASCII_WORD_CHARS = str.maketrans('', '', string.ascii_letters + string.digits + '_')
+
 # --- Hashing Logic ---
 
+def _new_hasher() -> Any:
+    """
+    Creates the hasher shared by all path hashing functions.
+
+    64-bit digests keep hashed path segments at 16 hex characters, which
+    shortens every children-dict key they end up in.
+    """
+    return hashlib.blake2b(digest_size=8)
+
 def _generate_hash(*args: Any) -> str:
     """
-    Generates a stable SHA256 hash for any number of arguments.
+    Generates a stable BLAKE2b hash for any number of arguments.
 
     Uses repr() for consistent serialization of various types before hashing.
-    Handles nested structures reasonably well due to repr().
+    Handles nested structures reasonably well due to repr(). Cache keys need
+    stability, not collision resistance against adversaries, so a 64-bit
+    BLAKE2b digest (faster than SHA256 in CPython) is used.
 
     Args:
         *args: Variable length argument list to be included in the hash.
 
     Returns:
-        A string representing the SHA256 hash of the arguments.
+        A string representing the BLAKE2b hash of the arguments.
     """
-    hasher = hashlib.sha256()
+    hasher = _new_hasher()
     try:
         # Use repr for stable serialization and handle different types
         # The repr of a tuple includes the repr of its elements recursively
@@ -29,51 +52,69 @@ def _generate_hash(*args: Any) -> str:
         hasher.update(serialized_args.encode('utf-8'))
         return hasher.hexdigest()
     except Exception as e:
-        log.error(f"Error generating hash for args: {args}. Error: {e}", exc_info=True)
+        log.error("Error generating hash for args: %s. Error: %s", args, e, exc_info=True)
         # Fallback or re-raise depending on desired robustness
         # Returning a constant error hash might hide issues but prevents crashes
         return "hashing_error"
 
 
+# Most builders default their params to None, so these are computed once at import
+_NONE_PARAMS_HASH = _generate_hash("NoneType_param") # Slightly more specific
+_EMPTY_PARAMS_HASH = _generate_hash("empty_structure_param")
+
+
 def hash_params(params: Optional[Union[Dict[str, Any], List[Any]]]) -> str:
     """
-    Generates a stable SHA256 hash for a dictionary or list of parameters.
+    Generates a stable BLAKE2b hash for a dictionary or list of parameters.
 
-    Handles None and empty structures distinctly. Uses _generate_hash internally.
-    Sorts dictionary keys for stability.
+    Handles None and empty structures distinctly. Dict and list entries are
+    streamed into the hasher one repr() at a time rather than building a
+    single repr of the whole structure. Sorts dictionary keys for stability.
 
     Args:
         params: A dictionary or list of parameters. Can be None.
 
     Returns:
-        A string representing the SHA256 hash of the parameters.
+        A string representing the BLAKE2b hash of the parameters.
     """
     if params is None:
         # Return a specific hash for None to distinguish from empty structures
-        return _generate_hash("NoneType_param") # Slightly more specific
+        return _NONE_PARAMS_HASH
     if not params:
         # Return a specific hash for empty structures (dict or list)
-        return _generate_hash("empty_structure_param")
+        return _EMPTY_PARAMS_HASH
 
     # Ensure dictionary keys are sorted for consistent hashing
     if isinstance(params, dict):
-        # Create a sorted representation (list of key-value tuples)
-        # This handles nested dicts/lists via repr() in _generate_hash
-        sorted_params_repr = sorted(params.items())
-        return _generate_hash(sorted_params_repr)
+        # Nested dicts/lists are covered by the repr() of each value
+        hasher = _new_hasher()
+        for key in sorted(params):
+            hasher.update(repr(key).encode('utf-8'))
+            hasher.update(b'=')
+            hasher.update(repr(params[key]).encode('utf-8'))
+            hasher.update(b';')
+        return hasher.hexdigest()
     elif isinstance(params, list):
-         # For lists, order matters, so hash directly
-        return _generate_hash(params)
+        # For lists, order matters, so hash in sequence
+        hasher = _new_hasher()
+        for item in params:
+            hasher.update(repr(item).encode('utf-8'))
+            hasher.update(b';')
+        return hasher.hexdigest()
     else:
         # Handle other types if necessary, or raise error
-        log.warning(f"Hashing unexpected parameter type: {type(params)}. Using direct hash.")
+        log.warning("Hashing unexpected parameter type: %s. Using direct hash.", type(params))
         return _generate_hash(params)
 
 
 # --- Date Formatting ---
 
+# Every metric path of an analysis repeats the same start/end dates, so the
+# (possibly multi-strptime) formatting is memoized. typed=True keeps a date
+# and an equal-comparing value of another type from sharing an entry.
+@functools.lru_cache(maxsize=1024, typed=True)
 def _format_date(d: Optional[Union[str, date, datetime]]) -> str:
-    """Helper to format dates consistently for paths."""
+    """Helper to format dates consistently for paths. Inputs must be hashable."""
     if isinstance(d, datetime):
         # Use ISO 8601 format with UTC offset handling if present, otherwise naive.
         # Replace colons in offset for filesystem compatibility if needed, though not strictly necessary for list paths.
@@ -98,16 +139,43 @@ def _format_date(d: Optional[Union[str, date, datetime]]) -> str:
                     return dt.date().isoformat()
                 except ValueError:
                     # Basic sanitization for other string formats
-                    log.debug(f"Could not parse date string '{d}', using sanitized version.")
-                    sanitized = re.sub(r'[^\w\-]+', '_', d) # Replace non-alphanumeric/- with _
+                    log.debug("Could not parse date string '%s', using sanitized version.", d)
+                    sanitized = _NON_WORD_DASH_RE.sub('_', d) # Replace non-alphanumeric/- with _
                     return sanitized if sanitized else "invalid_date_str"
     elif d is None:
         return "None"
     else:
         # Fallback for other types
-        log.warning(f"Formatting unexpected date type: {type(d)}. Using str().")
+        log.warning("Formatting unexpected date type: %s. Using str().", type(d))
         return str(d)
 
+# --- Symbol Sanitization ---
+
+@functools.lru_cache(maxsize=1024)
+def _sanitize_symbol(symbol: str) -> str:
+    """
+    Uppercases a symbol, replacing each run of non-word characters with '_'.
+
+    Most tickers are already plain ASCII words; those are detected with a
+    single str.translate pass and skip the regex substitution entirely.
+    """
+    if not symbol.translate(_DELETE_ASCII_WORD_CHARS):
+        return symbol.upper()
+    return _NON_WORD_RE.sub('_', symbol).upper()
+
+# --- Segment Normalization ---
+
+@functools.lru_cache(maxsize=256)
+def _norm_lower(value: Any) -> str:
+    """
+    Returns str(value).lower(), interned.
+
+    Sources and intervals come from a handful of values ("yahoo", "1d", ...)
+    repeated across every build, so repeat calls are a cache hit instead of
+    two fresh string allocations.
+    """
+    return sys.intern(str(value).lower())
+
 # --- Path Building Functions ---
 
 def build_raw_data_path(
@@ -118,17 +186,20 @@ def build_raw_data_path(
     interval: str
 ) -> List[str]:
     """Builds the cache path components for raw market data."""
-    if not all([source, symbol, interval]):
+    if not (source and symbol and interval):
         raise ValueError("Source, symbol, and interval cannot be empty.")
     # Sanitize symbol: uppercase and replace non-alphanumeric with underscore
-    sanitized_symbol = re.sub(r'\W+', '_', symbol).upper()
+    sanitized_symbol = _sanitize_symbol(symbol)
+    # Computed segments are interned: sources, symbols, dates and intervals
+    # recur across many paths, and interned keys match the tree's (interned)
+    # node identifiers by identity during dict lookups
     return [
         "raw_data",
-        str(source).lower(),
-        sanitized_symbol,
-        f"start_{_format_date(start_date)}",
-        f"end_{_format_date(end_date)}",
-        f"interval_{str(interval).lower()}"
+        _norm_lower(source),
+        sys.intern(sanitized_symbol),
+        sys.intern(f"start_{_format_date(start_date)}"),
+        sys.intern(f"end_{_format_date(end_date)}"),
+        sys.intern(f"interval_{_norm_lower(interval)}")
     ]
 
 def build_transformed_data_path(
@@ -139,7 +210,7 @@ def build_transformed_data_path(
     if not raw_data_path or raw_data_path[0] != "raw_data":
          raise ValueError("Invalid raw_data_path provided for transformation.")
     transform_hash = hash_params(steps_config)
-    return raw_data_path + ["transformed", f"config_{transform_hash}"]
+    return raw_data_path + ["transformed", sys.intern(f"config_{transform_hash}")]
 
 def build_indicator_path(
     transformed_data_path: List[str],
@@ -152,9 +223,9 @@ def build_indicator_path(
     if not indicator_name:
         raise ValueError("Indicator name cannot be empty.")
 
-    indicator_name_safe = re.sub(r'\s+', '_', indicator_name).lower() # Replace spaces with _
+    indicator_name_safe = _WHITESPACE_RE.sub('_', indicator_name).lower() # Replace spaces with _
     params_hash = hash_params(indicator_params)
-    return transformed_data_path + ["indicators", f"{indicator_name_safe}_{params_hash}"]
+    return transformed_data_path + ["indicators", sys.intern(f"{indicator_name_safe}_{params_hash}")]
 
 def build_portfolio_analysis_path(
     trade_source_info: str, # e.g., csv_filename_hash or db_query_hash or label
@@ -169,17 +240,19 @@ def build_portfolio_analysis_path(
          raise ValueError("Trade source info, market data symbols, and interval are required.")
 
     # Sanitize symbols before joining, ensure consistent order
-    sanitized_symbols = sorted([re.sub(r'\W+', '_', s).upper() for s in market_data_symbols])
+    # Sorted in place: sorted() on the comprehension would copy the list again
+    sanitized_symbols = [_sanitize_symbol(s) for s in market_data_symbols]
+    sanitized_symbols.sort()
     symbols_str = "_".join(sanitized_symbols) if sanitized_symbols else "no_symbols"
     params_hash = hash_params(analysis_params)
     return [
         "portfolio_analysis",
-        f"trades_{str(trade_source_info)}", # Keep trade source info separate
-        f"market_{symbols_str}",
-        f"start_{_format_date(start_date)}",
-        f"end_{_format_date(end_date)}",
-        f"interval_{str(interval).lower()}",
-        f"params_{params_hash}" # Hash of analysis-specific parameters
+        sys.intern(f"trades_{str(trade_source_info)}"), # Keep trade source info separate
+        sys.intern(f"market_{symbols_str}"),
+        sys.intern(f"start_{_format_date(start_date)}"),
+        sys.intern(f"end_{_format_date(end_date)}"),
+        sys.intern(f"interval_{_norm_lower(interval)}"),
+        sys.intern(f"params_{params_hash}") # Hash of analysis-specific parameters
     ]
 
 def build_portfolio_metric_path(
@@ -193,10 +266,10 @@ def build_portfolio_metric_path(
     if not metric_name:
         raise ValueError("Metric name cannot be empty.")
 
-    metric_name_safe = re.sub(r'\s+', '_', metric_name).lower()
+    metric_name_safe = _WHITESPACE_RE.sub('_', metric_name).lower()
     params_hash = hash_params(metric_params)
     # Path structure: base_analysis_path / metrics / metric_name_params_hash
-    return portfolio_analysis_path + ["metrics", f"{metric_name_safe}_{params_hash}"]
+    return portfolio_analysis_path + ["metrics", sys.intern(f"{metric_name_safe}_{params_hash}")]
 
 def build_portfolio_benchmark_metric_path(
     portfolio_analysis_path: List[str],
@@ -210,12 +283,16 @@ def build_portfolio_benchmark_metric_path(
     if not benchmark_symbol or not metric_name:
         raise ValueError("Benchmark symbol and metric name cannot be empty.")
 
-    metric_name_safe = re.sub(r'\s+', '_', metric_name).lower()
+    metric_name_safe = _WHITESPACE_RE.sub('_', metric_name).lower()
     # Sanitize benchmark symbol for path inclusion
-    sanitized_benchmark = re.sub(r'\W+', '_', benchmark_symbol).upper()
+    sanitized_benchmark = _sanitize_symbol(benchmark_symbol)
     params_hash = hash_params(metric_params)
     # Path structure: base_analysis_path / benchmark_metrics / benchmark_symbol / metric_name_params_hash
-    return portfolio_analysis_path + ["benchmark_metrics", sanitized_benchmark, f"{metric_name_safe}_{params_hash}"]
+    return portfolio_analysis_path + [
+        "benchmark_metrics",
+        sys.intern(sanitized_benchmark),
+        sys.intern(f"{metric_name_safe}_{params_hash}"),
+    ]
 
 
 # Example Usage (updated for demonstration) - Keep this for testing the module directly
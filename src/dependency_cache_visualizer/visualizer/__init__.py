@@ -30,13 +30,13 @@ async def start_visualizer(
     if not isinstance(cache_instance, DataCache):
         raise TypeError("cache_instance must be an instance of DataCache")
 
-    log.info(f"Preparing to start visualizer server on {host}:{port}")
-    log.info(f"Visualizing DataCache instance: {cache_instance}")
+    log.info("Preparing to start visualizer server on %s:%s", host, port)
+    log.info("Visualizing DataCache instance: %s", cache_instance)
 
     # --- Crucial Step: Pass the cache instance to the app ---
     # Set the instance in the shared state *before* creating/running the app
     app_state["cache_instance"] = cache_instance
-    log.debug(f"Set cache_instance in app_state: {app_state['cache_instance']}")
+    log.debug("Set cache_instance in app_state: %s", app_state['cache_instance'])
 
     app = create_app()
 
@@ -59,7 +59,7 @@ async def start_visualizer(
     except asyncio.CancelledError:
         log.info("Visualizer server task cancelled.")
     except Exception as e:
-        log.exception(f"Visualizer server encountered an error: {e}")
+        log.exception("Visualizer server encountered an error: %s", e)
     finally:
         log.info("Visualizer server stopped.")
         if app_state.get("cache_instance") is not None:
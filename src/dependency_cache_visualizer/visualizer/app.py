@@ -1,15 +1,19 @@
+import hashlib
 import logging
 import os
 from pathlib import Path
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from starlette.types import Scope
 
-from ..core import DataCache # Import from parent core module
-from .routes import router as api_router, get_cache_instance # Import router and dependency function
+from .routes import router as api_router, ORJSONResponse, etag_matches # Import router and helpers
 
 log = logging.getLogger(__name__)
 
@@ -17,17 +21,6 @@ log = logging.getLogger(__name__)
 # This dictionary will hold the state accessible by the lifespan manager
 app_state = {"cache_instance": None}
 
-# --- Dependency Override ---
-# This function will replace the placeholder in routes.py
-async def get_live_cache_instance() -> DataCache:
-    """Dependency function to provide the live cache instance."""
-    instance = app_state.get("cache_instance")
-    if instance is None:
-        # This should not happen if lifespan is used correctly
-        log.error("Cache instance not found in app state!")
-        raise RuntimeError("Cache instance has not been initialized.")
-    return instance
-
 # --- Lifespan Management ---
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -43,31 +36,70 @@ async def lifespan(app: FastAPI):
          # Optionally raise an error here if it's critical
          # raise RuntimeError("Cache instance must be set before application startup")
     else:
-         log.info(f"Cache instance type during startup: {type(app_state['cache_instance'])}")
+         log.info("Cache instance type during startup: %s", type(app_state['cache_instance']))
+         # Pick up an instance set after create_app; routes read it from app.state
+         app.state.cache = app_state["cache_instance"]
 
     yield # Application runs here
 
     # --- Shutdown logic ---
     log.info("Visualizer FastAPI app shutting down...")
     app_state["cache_instance"] = None # Clear the reference on shutdown
+    app.state.cache = None
+
+
+# --- Static Files with SPA Fallback ---
+class SPAStaticFiles(StaticFiles):
+    """
+    StaticFiles that answers unknown non-API paths with the SPA's index.html.
+
+    The mount sits at "/" and so sees every path the API router does not
+    match; deep links that are not files get the page, read once here with
+    an ETag, instead of a 404. Unknown /api paths still 404.
+    """
+
+    def __init__(self, directory: Path):
+        super().__init__(directory=directory, html=True)
+        # Re-opening the file for every deep link buys nothing
+        self.index_bytes = (directory / "index.html").read_bytes()
+        self.index_etag = f'"{hashlib.blake2b(self.index_bytes, digest_size=8).hexdigest()}"'
+        self.index_headers = {"ETag": self.index_etag, "Cache-Control": "no-cache"}
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        try:
+            return await super().get_response(path, scope)
+        except StarletteHTTPException as exc:
+            if exc.status_code != 404 or path == "api" or path.startswith("api/"):
+                raise
+        log.debug("No static file for path: %s. Serving index.html.", path)
+        if etag_matches(Headers(scope=scope).get("if-none-match"), self.index_etag):
+            return Response(status_code=304, headers=self.index_headers)
+        return Response(content=self.index_bytes, media_type="text/html", headers=self.index_headers)
 
 
 # --- FastAPI App Creation ---
-def create_app() -> FastAPI:
-    """Creates and configures the FastAPI application instance."""
+def create_app(frontend_build_dir: Optional[Path] = None) -> FastAPI:
+    """
+    Creates and configures the FastAPI application instance.
+
+    Args:
+        frontend_build_dir: Directory of the built frontend to serve; defaults
+                            to the frontend_build directory next to this file.
+    """
 
     log.debug("Creating FastAPI application instance.")
     app = FastAPI(
         title="Dependency Cache Visualizer API",
         description="API endpoints for interacting with and visualizing the dependency cache.",
         version="1.0.0", # API version, distinct from package version
-        lifespan=lifespan # Use lifespan manager
+        lifespan=lifespan, # Use lifespan manager
+        default_response_class=ORJSONResponse, # Plain dict returns skip stdlib json
     )
 
-    # --- Dependency Override ---
-    # Replace the placeholder dependency with the live one
-    app.dependency_overrides[get_cache_instance] = get_live_cache_instance
-    log.debug("Overrode get_cache_instance dependency.")
+    # --- Cache Instance ---
+    # Routes read the cache from app.state rather than through Depends();
+    # tests can swap it by assigning app.state.cache
+    app.state.cache = app_state.get("cache_instance")
 
     # --- CORS Middleware ---
     app.add_middleware(
@@ -81,6 +113,12 @@ def create_app() -> FastAPI:
     )
     log.debug("CORS middleware added.")
 
+    # --- Compression Middleware ---
+    # /tree payloads repeat the same field names for every node and compress
+    # several-fold; small responses (messages, stats) are sent as-is
+    app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+    log.debug("GZip middleware added.")
+
     # --- API Router ---
     app.include_router(api_router, prefix="/api") # Prefix API routes
     log.debug("API router included with prefix /api.")
@@ -91,35 +129,25 @@ def create_app() -> FastAPI:
     # Path(__file__).parent gives the visualizer directory
     # .parent gives the dependency_cache_visualizer directory
     # then navigate to visualizer/frontend_build
-    frontend_build_dir = Path(__file__).parent / "frontend_build"
-    log.info(f"Attempting to serve static files from: {frontend_build_dir.resolve()}")
+    if frontend_build_dir is None:
+        frontend_build_dir = Path(__file__).parent / "frontend_build"
+    log.info("Attempting to serve static files from: %s", frontend_build_dir.resolve())
 
     if frontend_build_dir.is_dir() and (frontend_build_dir / "index.html").is_file():
         log.info("Frontend build directory found. Mounting StaticFiles.")
         # Mount static files AFTER API routes to avoid conflicts
+        # A route registered after a root mount is never reached, so deep
+        # links (SPA routing) are served by the mount's own 404 fallback
         app.mount(
             "/",
-            StaticFiles(directory=frontend_build_dir, html=True),
+            SPAStaticFiles(directory=frontend_build_dir),
             name="static_frontend"
         )
 
-        # Add a catch-all route to serve index.html for SPA routing
-        # This should come after the StaticFiles mount
-        @app.get("/{full_path:path}", include_in_schema=False)
-        async def serve_spa(full_path: str):
-            log.debug(f"Catch-all route triggered for path: {full_path}. Serving index.html.")
-            index_path = frontend_build_dir / "index.html"
-            if index_path.is_file():
-                return FileResponse(index_path)
-            else:
-                # Should not happen if StaticFiles mounted correctly
-                log.error("index.html not found in catch-all route!")
-                raise HTTPException(status_code=404, detail="Frontend not found.")
-
     else:
         log.warning(
-            f"Frontend build directory '{frontend_build_dir}' not found or "
-            f"'index.html' missing. Static file serving disabled."
+            "Frontend build directory '%s' not found or 'index.html' missing. Static file serving disabled.",
+            frontend_build_dir,
         )
         # Add a root endpoint to indicate the API is running without the frontend
         @app.get("/", include_in_schema=False)
@@ -1,7 +1,15 @@
+import asyncio
+import functools
 import logging
-from typing import List, Dict, Any, Optional
+import math
+import os
+from typing import List, Dict, Any, Mapping, Optional, Set, Tuple, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Body
+import orjson
+from fastapi import APIRouter, HTTPException, Body, Request, Response, WebSocket
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from starlette.requests import HTTPConnection
 
 from ..core import DataCache, DependencyNode # Import from parent core module
 from .schemas import (
@@ -12,172 +20,546 @@ from .schemas import (
 
 log = logging.getLogger(__name__)
 
-# This function will be used for dependency injection to get the cache instance
-# It will be set up in app.py or __init__.py
-async def get_cache_instance() -> DataCache:
-    # This is a placeholder implementation.
-    # The actual implementation will depend on how the instance is passed.
-    # See app.py / __init__.py for the setup.
-    raise NotImplementedError("Cache instance dependency not configured")
+def lookup_cache(connection: HTTPConnection) -> Optional[DataCache]:
+    """
+    Returns the cache instance the app serves, or None (logged) if unset.
+
+    create_app stores it on app.state.cache (tests may set it there directly);
+    reading it from the request or websocket is a plain attribute lookup,
+    with none of the per-request work of a Depends() resolution.
+    """
+    cache = connection.app.state.cache
+    if cache is None:
+        log.error("Cache instance not found in app state!")
+    return cache
+
+def get_cache(request: Request) -> DataCache:
+    """
+    Returns the cache instance the app serves, for HTTP routes.
+
+    Raises:
+        HTTPException: 500 if no cache instance has been set.
+    """
+    cache = lookup_cache(request)
+    if cache is None:
+        raise HTTPException(status_code=500, detail="Cache instance has not been initialized.")
+    return cache
 
 # Create API router
 router = APIRouter()
 
+# Tree versions restart with the process, so ETags carry a per-process prefix
+# to keep a client's cached tree from matching after a restart
+_ETAG_PREFIX = os.urandom(4).hex()
+
+# Trees with more nodes than this are rendered on a worker thread
+_THREAD_RENDER_MIN_NODES = 500
+
+# Upper bound on memoized node lookups per tree version
+_NODE_LOOKUP_CACHE_SIZE = 4096
+
+# Events a lagging /events client may have queued before it is resynced
+_EVENT_QUEUE_SIZE = 1000
+
+# Non-string keys are stringified, as jsonable_encoder would, and numpy arrays
+# in cached payloads are encoded natively. Datetimes (and dataclasses) need no
+# option; naive timestamps are local time, so OPT_NAIVE_UTC must not be used.
+_ORJSON_RESPONSE_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+
+    Defined here rather than imported from fastapi.responses, where newer
+    FastAPI releases deprecate it; rendering is a single orjson.dumps call,
+    with _orjson_default covering the types orjson does not handle itself.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default, option=_ORJSON_RESPONSE_OPTIONS)
+
+def _orjson_default(obj: Any) -> Any:
+    """
+    Converts values orjson cannot serialize natively.
+
+    Read-only mappings (e.g. the stats snapshot) become dicts and sets become
+    lists; anything else, such as arbitrary cached payloads returned by
+    /get-data, goes through FastAPI's jsonable_encoder, as it did when
+    responses were validated.
+    """
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return jsonable_encoder(obj)
+
+def _has_non_finite_float(obj: Any) -> bool:
+    """Checks a payload's plain containers for NaN or infinite floats."""
+    pending = [obj]
+    while pending:
+        item = pending.pop()
+        if isinstance(item, float):
+            if not math.isfinite(item):
+                return True
+        elif isinstance(item, Mapping):
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+    return False
+
+def payload_response(content: Dict[str, Any]) -> Response:
+    """
+    Renders a response embedding a cached payload under "data".
+
+    orjson is used when it can encode the payload exactly. Payloads it
+    rejects (such as integers beyond 64 bits) or would silently alter (NaN
+    and infinities become null) take the jsonable_encoder + JSONResponse
+    path instead, which keeps big integers and refuses non-finite floats,
+    as responses did before orjson.
+    """
+    if not _has_non_finite_float(content["data"]):
+        try:
+            return ORJSONResponse(content)
+        except TypeError: # orjson.JSONEncodeError is a TypeError
+            pass
+    return JSONResponse(jsonable_encoder(content))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an If-None-Match header against a response's strong ETag.
+
+    Uses the weak comparison If-None-Match calls for: the header may list
+    several tags, or be "*", and a W/ prefix (added e.g. by compressing
+    proxies) is ignored.
+
+    Args:
+        if_none_match: The request's If-None-Match header, if any.
+        etag: The quoted ETag of the current representation.
+
+    Returns:
+        True if the client's cached copy is current.
+    """
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return True
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+def format_data_hash(data_hash: Optional[int]) -> Optional[str]:
+    """
+    Formats a node's integer data hash as 16 hex characters for the API.
+
+    Kept as a string on the wire because JavaScript numbers cannot represent
+    every 64-bit integer exactly.
+    """
+    return f"{data_hash:016x}" if data_hash is not None else None
+
+# Fixed bodies of the write endpoints, encoded once at import
+_STATS_RESET_BODY = orjson.dumps({"message": "Statistics reset successfully"})
+_DATA_ADDED_BODY = orjson.dumps({"message": "Data added/updated successfully"})
+_PATH_INVALIDATED_BODY = orjson.dumps({"message": "Cache path invalidated successfully"})
+
+def message_response(body: bytes) -> Response:
+    """
+    Wraps a pre-encoded message body in a JSON response.
+
+    A new Response is built per request because middleware (CORS, for one)
+    adds headers to the response object; only the encoded bytes are shared.
+    """
+    return Response(content=body, media_type="application/json")
+
+def split_path(path: Union[str, List[str]]) -> Tuple[str, ...]:
+    """
+    Turns a request path into the identifier tuple the cache expects.
+
+    Leading and trailing slashes of a string path are ignored, so '/a/b/'
+    is the same path as 'a/b'.
+
+    Args:
+        path: An 'a/b/c' string ('' or '/' for the root), or an identifier list.
+
+    Returns:
+        The path as a tuple of identifiers.
+
+    Raises:
+        HTTPException: 400 if the path has an empty segment (e.g. 'a//b').
+    """
+    parts = _split_path_str(path) if isinstance(path, str) else tuple(path)
+    if "" in parts:
+        raise HTTPException(status_code=400, detail="Path segments cannot be empty.")
+    return parts
+
+# Dashboards request the same node paths over and over, so both the split and
+# the node lookup are memoized
+@functools.lru_cache(maxsize=4096)
+def _split_path_str(path: str) -> Tuple[str, ...]:
+    """Splits an 'a/b/c' path string, ignoring outer slashes; memoized per string."""
+    path = path.strip("/")
+    return tuple(path.split("/")) if path else ()
+
+def resolve_node(cache: DataCache, path: Tuple[str, ...]) -> Optional[DependencyNode]:
+    """
+    Looks up the node at path, memoized on the cache until the tree changes.
+
+    The memo lives on the cache and is emptied as soon as the tree state
+    (see tree_state) moves on, so it never keeps a detached node (or a cache
+    the app no longer serves) alive. Misses are not memoized, since a plain
+    add_child can attach the node without moving the tree state.
+    """
+    key = tree_state(cache)
+    lookups = cache.node_lookups
+    if cache.node_lookups_key != key:
+        lookups = cache.node_lookups = {}
+        cache.node_lookups_key = key
+    try:
+        return lookups[path]
+    except KeyError:
+        pass
+    node = cache.dependency_tree.get_node(path)
+    if node is not None and len(lookups) < _NODE_LOOKUP_CACHE_SIZE:
+        lookups[path] = node
+    return node
+
 # --- Helper Function to Serialize Tree ---
-async def serialize_node(node: DependencyNode) -> TreeNode:
-    """Recursively convert a DependencyNode to a serializable TreeNode."""
+def serialize_node(node: DependencyNode) -> Optional[Dict[str, Any]]:
+    """
+    Convert a DependencyNode and its subtree to a JSON-ready dict.
+
+    The dict has the TreeNode shape but is built directly, with the raw
+    datetime left for orjson to encode as ISO 8601, so it can be handed to
+    orjson without Pydantic validation or jsonable_encoder. Pure in-memory work, so this is
+    a plain function: the subtree is listed breadth-first, then built in
+    reverse so every node's children are serialized before the node itself,
+    with no recursion or coroutine frames, whatever the depth.
+
+    Each node's dict is memoized on node.serialized, which the node clears
+    along its ancestor chain on every write, so only the ancestors of changed
+    nodes are rebuilt on the next request. The returned dicts are shared and
+    must not be mutated.
+    """
     if node is None:
         return None # Should not happen for root, but good practice
 
-    children_data = {}
-    # Directly iterate over children dictionary items
-    for child_id, child_node in node.children.items():
-         children_data[child_id] = await serialize_node(child_node)
-
-    # --- Logging added for debugging ---
-    current_path_for_log = []
-    temp_node = node
-    while temp_node and temp_node.parent: # Traverse up to the node just below root
-        current_path_for_log.insert(0, temp_node.identifier)
-        temp_node = temp_node.parent
-    path_str_for_log = "/".join(current_path_for_log)
-
-    log.debug(f"Serializing node: {node.identifier}, Path: {path_str_for_log}, Has Data according to node.data: {node.data is not None}")
-    # Check specifically for the problematic path if possible
-    if "interval_day" == node.identifier: # Check if the current node is an interval_day node
-         log.warning(f"CHECKING interval_day node during serialization: {node.identifier}, Path: {path_str_for_log}, node.data is None: {node.data is None}")
-    # --- End of added logging ---
-
-    return TreeNode(
-        identifier=node.identifier,
-        has_data=node.data is not None,
-        data_hash=node.data_hash,
-        timestamp=node.timestamp,
-        children=children_data
-    )
+    # Nodes needing a (re)build, parents before children; memoized
+    # subtrees are neither listed nor descended into
+    stale = [node] if node.serialized is None else []
+    for current in stale: # The list doubles as the BFS queue
+        stale.extend(child for child in current.children.values() if child.serialized is None)
+
+    debug = log.isEnabledFor(logging.DEBUG)
+    for current in reversed(stale): # Children are always built before their parent
+        if debug:
+            log.debug("Serializing node: %s has_data=%s", current.identifier, current.data is not None)
+        current.serialized = {
+            "identifier": current.identifier,
+            "has_data": current.data is not None,
+            "data_hash": format_data_hash(current.data_hash),
+            "timestamp": current.timestamp, # Encoded natively by orjson
+            "children": {
+                child_id: child_node.serialized
+                for child_id, child_node in current.children.items()
+            },
+        }
+
+    return node.serialized
+
+def render_tree(root: DependencyNode) -> bytes:
+    """Serializes the tree under root to JSON bytes (the /tree payload)."""
+    # Matches the TreeResponse schema (checked against it in the API tests)
+    # without building a model per node; the schema only documents the route
+    return orjson.dumps(serialize_node(root), option=_ORJSON_RESPONSE_OPTIONS)
+
+def tree_state(cache: DataCache) -> Tuple[int, int]:
+    """
+    Returns a key that changes whenever the cache's tree may have changed.
+
+    The tree version covers writes through the cache; the node structure
+    version covers children detached through the public node methods.
+    """
+    return cache.version, DependencyNode.structure_version
+
+async def current_tree_json(cache: DataCache) -> Tuple[bytes, int]:
+    """
+    Returns the /tree payload for the cache's current state, and the tree version.
+
+    The rendered bytes are kept on the cache, so every /tree client and
+    /events snapshot in the same state (see tree_state) shares one rendering.
+    """
+    key = tree_state(cache)
+    version = key[0]
+    tree_json = cache.tree_json
+    if cache.tree_json_key != key:
+        tree = cache.dependency_tree
+        if tree.node_count > _THREAD_RENDER_MIN_NODES:
+            # Keep other requests served while a big tree renders
+            tree_json = await tree.read_in_thread(render_tree, tree.root)
+        else:
+            tree_json = render_tree(tree.root)
+        cache.tree_json = tree_json
+        cache.tree_json_key = key
+    return tree_json, version
+
+class EventBroadcaster:
+    """
+    Fans a cache's mutation events out to the connected /events clients.
+
+    Registered as a single cache listener while any client is subscribed,
+    so each event is encoded once however many clients receive it. The
+    client queues belong to the event loop the clients subscribed on; events
+    raised from other threads (e.g. a synchronous reset_stats) are handed
+    over to it with call_soon_threadsafe.
+    """
+
+    def __init__(self, cache: DataCache):
+        self.cache = cache
+        self.queues: Set[asyncio.Queue] = set()
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Returns a new client queue of encoded events (None means resync)."""
+        if not self.queues:
+            self.loop = asyncio.get_running_loop()
+            self.cache.add_listener(self.on_event)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=_EVENT_QUEUE_SIZE)
+        self.queues.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Drops a client queue, detaching from the cache after the last one."""
+        self.queues.discard(queue)
+        if not self.queues:
+            self.cache.remove_listener(self.on_event)
+            _broadcasters.pop(self.cache, None)
+
+    def on_event(self, op: str, path: List[str], node: Optional[DependencyNode]) -> None:
+        """Encodes one cache mutation and queues it for every client."""
+        event: Dict[str, Any] = {
+            "op": op,
+            "path": path,
+            "version": self.cache.version,
+            "stats_version": self.cache.stats_version,
+        }
+        if node is not None:
+            event["data_hash"] = format_data_hash(node.data_hash)
+            event["timestamp"] = node.timestamp
+        message = orjson.dumps(event).decode()
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self.deliver(message)
+        else:
+            self.loop.call_soon_threadsafe(self.deliver, message)
+
+    def deliver(self, message: str) -> None:
+        """Queues an encoded event for every client; runs on the clients' loop."""
+        for queue in self.queues:
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # A client this far behind gets a fresh snapshot instead
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+# Broadcasters by cache, present while the cache has /events clients
+_broadcasters: Dict[DataCache, EventBroadcaster] = {}
+
+# Queued for an /events sender once its client has disconnected
+_DISCONNECTED = object()
+
+async def _wait_for_disconnect(websocket: WebSocket, queue: asyncio.Queue) -> None:
+    """Consumes client messages until the client disconnects, then wakes the sender."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+    while True:
+        try:
+            queue.put_nowait(_DISCONNECTED)
+            return
+        except asyncio.QueueFull:
+            queue.get_nowait() # The client is gone; its backlog can go
 
 # --- API Endpoints ---
 
-@router.get("/tree", response_model=TreeResponse, summary="Get Cache Tree Structure")
-async def get_tree(
-    cache: DataCache = Depends(get_cache_instance)
-):
+@router.get("/tree", responses={200: {"model": TreeResponse}}, summary="Get Cache Tree Structure")
+async def get_tree(request: Request):
     """
     Retrieves the entire dependency cache tree structure starting from the root.
+
+    The response carries an ETag derived from the tree state (see
+    tree_state); a poll presenting it in If-None-Match gets 304 Not Modified
+    until the next change. The rendered JSON is kept on the cache, so other
+    clients polling the same state are served the stored bytes.
     """
     log.debug("Received request for /tree")
+    cache = get_cache(request)
+    version, structure_version = tree_state(cache)
+    etag = f'"{_ETAG_PREFIX}-{version}-{structure_version}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
     try:
-        # Serialize the tree structure starting from the actual root node
-        # The TreeResponse schema matches the TreeNode structure
-        tree_data = await serialize_node(cache.dependency_tree.root)
-        if tree_data is None: # Should ideally not happen unless root is corrupt
-             raise HTTPException(status_code=500, detail="Failed to serialize root node.")
-        return tree_data
+        tree_json, _ = await current_tree_json(cache)
+        return Response(content=tree_json, media_type="application/json", headers={"ETag": etag})
     except Exception as e:
         log.exception("Error getting tree structure: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting tree: {str(e)}")
 
-@router.get("/stats", response_model=StatsResponse, summary="Get Cache Statistics")
-async def get_stats(
-    cache: DataCache = Depends(get_cache_instance)
-):
+@router.get("/stats", responses={200: {"model": StatsResponse}}, summary="Get Cache Statistics")
+async def get_stats(request: Request, since: Optional[int] = None):
     """
     Retrieves the current statistics for the cache instance.
+
+    Pass the "version" of a previous response as ?since= to receive only the
+    paths whose counters changed after it in the paths_* dictionaries.
     """
     log.debug("Received request for /stats")
+    cache = get_cache(request)
     try:
-        stats = cache.get_stats()
-        # Calculate hit ratio here if not done in Pydantic model
-        gets = stats.get('gets', 0)
-        hits = stats.get('hits', 0)
-        if gets > 0:
-            stats['hit_ratio'] = (hits / gets) * 100.0
-        else:
-            stats['hit_ratio'] = None
-        return StatsResponse(**stats)
+        # The snapshot already includes hit_ratio; its read-only mappings are
+        # turned into dicts by the response's orjson default hook
+        return ORJSONResponse(cache.get_stats(since))
     except Exception as e:
         log.exception("Error getting stats: %s", e)
         raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
 
-@router.post("/reset-stats", response_model=MessageResponse, summary="Reset Cache Statistics")
-async def reset_stats(
-    cache: DataCache = Depends(get_cache_instance)
-):
+@router.post("/reset-stats", responses={200: {"model": MessageResponse}}, summary="Reset Cache Statistics")
+async def reset_stats(request: Request):
     """
     Resets all cache statistics to their initial zeroed state.
     """
     log.info("Received request to reset stats")
+    cache = get_cache(request)
     try:
         cache.reset_stats()
-        return MessageResponse(message="Statistics reset successfully")
+        return message_response(_STATS_RESET_BODY)
     except Exception as e:
         log.exception("Error resetting stats: %s", e)
         raise HTTPException(status_code=500, detail=f"Error resetting stats: {str(e)}")
 
-@router.post("/get-data", response_model=GetDataResponse, summary="Get Data from Path")
+@router.post("/get-data", responses={200: {"model": GetDataResponse}}, summary="Get Data from Path")
 async def get_data(
-    request: PathRequest, # Use the simple PathRequest model
-    cache: DataCache = Depends(get_cache_instance)
+    body: PathRequest, # Use the simple PathRequest model
+    request: Request,
 ):
     """
     Retrieves data and metadata for a specific node path.
     """
-    log.debug(f"Received request for /get-data for path: {request.path}")
+    log.debug("Received request for /get-data for path: %s", body.path)
+    cache = get_cache(request)
+    path = split_path(body.path)
     try:
         # Use get_node to get metadata even if data is None
-        node = await cache.dependency_tree.get_node(request.path)
+        node = resolve_node(cache, path)
         if node:
-            return GetDataResponse(
-                path=request.path,
-                data=node.data,
-                data_hash=node.data_hash,
-                timestamp=node.timestamp,
-                node_exists=True
-            )
+            return payload_response({
+                "path": path,
+                "data": node.data,
+                "data_hash": format_data_hash(node.data_hash),
+                "timestamp": node.timestamp,
+                "node_exists": True,
+            })
         else:
-            return GetDataResponse(
-                path=request.path,
-                data=None,
-                data_hash=None,
-                timestamp=None,
-                node_exists=False
-            )
+            return ORJSONResponse({
+                "path": path,
+                "data": None,
+                "data_hash": None,
+                "timestamp": None,
+                "node_exists": False,
+            })
     except Exception as e:
-        log.exception("Error getting data for path %s: %s", request.path, e)
+        log.exception("Error getting data for path %s: %s", path, e)
         raise HTTPException(status_code=500, detail=f"Error getting data: {str(e)}")
 
-@router.post("/add-data", response_model=MessageResponse, summary="Add or Update Data")
+@router.post("/add-data", responses={200: {"model": MessageResponse}}, summary="Add or Update Data")
 async def add_data(
-    request: PathDataRequest, # Use model with path and data
-    cache: DataCache = Depends(get_cache_instance)
+    body: PathDataRequest, # Use model with path and data
+    request: Request,
 ):
     """
     Adds or updates data at a specific node path. Creates nodes if they don't exist.
     """
-    log.info(f"Received request for /add-data for path: {request.path}")
-    if not request.path:
+    log.info("Received request for /add-data for path: %s", body.path)
+    cache = get_cache(request)
+    path = split_path(body.path)
+    if not path:
          raise HTTPException(status_code=400, detail="Path cannot be empty for add-data.")
     try:
-        await cache.add_or_update_data(request.path, request.data)
-        return MessageResponse(message="Data added/updated successfully")
+        await cache.add_or_update_data(path, body.data)
+        return message_response(_DATA_ADDED_BODY)
     except Exception as e:
-        log.exception("Error adding/updating data for path %s: %s", request.path, e)
+        log.exception("Error adding/updating data for path %s: %s", path, e)
         raise HTTPException(status_code=500, detail=f"Error adding data: {str(e)}")
 
-@router.post("/invalidate", response_model=MessageResponse, summary="Invalidate Path Subtree")
+@router.post("/invalidate", responses={200: {"model": MessageResponse}}, summary="Invalidate Path Subtree")
 async def invalidate(
-    request: PathRequest, # Use the simple PathRequest model
-    cache: DataCache = Depends(get_cache_instance)
+    body: PathRequest, # Use the simple PathRequest model
+    request: Request,
 ):
     """
     Invalidates the node at the specified path and its entire subtree.
     """
-    log.info(f"Received request for /invalidate for path: {request.path}")
-    if not request.path:
+    log.info("Received request for /invalidate for path: %s", body.path)
+    cache = get_cache(request)
+    path = split_path(body.path)
+    if not path:
          raise HTTPException(status_code=400, detail="Path cannot be empty for invalidate.")
     try:
-        await cache.invalidate(request.path)
-        return MessageResponse(message="Cache path invalidated successfully")
+        await cache.invalidate(path)
+        return message_response(_PATH_INVALIDATED_BODY)
     except Exception as e:
-        log.exception("Error invalidating path %s: %s", request.path, e)
+        log.exception("Error invalidating path %s: %s", path, e)
         raise HTTPException(status_code=500, detail=f"Error invalidating cache: {str(e)}")
+
+@router.websocket("/events")
+async def events(websocket: WebSocket):
+    """
+    Streams cache changes to the client, replacing /tree and /stats polling.
+
+    The first message is {"op": "snapshot", "version": ..., "tree": ...}
+    carrying the /tree payload. Each later message describes one mutation:
+    "add" (with data_hash and timestamp), "invalidate" or "reset_stats",
+    plus the tree "version" and "stats_version" after it; /stats?since= can
+    fetch the counters that moved. A client that falls too far behind is
+    sent a new snapshot.
+    """
+    cache = lookup_cache(websocket)
+    if cache is None:
+        await websocket.close(code=1011)
+        return
+    await websocket.accept()
+    log.info("Client connected to /events")
+    broadcaster = _broadcasters.get(cache)
+    if broadcaster is None:
+        broadcaster = _broadcasters[cache] = EventBroadcaster(cache)
+    # Subscribed before the snapshot, so no event is missed; events already
+    # reflected in it carry a version no newer than the snapshot's
+    queue = broadcaster.subscribe()
+    # The watcher ends the stream through the queue, so the sender only
+    # ever awaits queue.get() and leaves no per-message task behind
+    disconnected = asyncio.create_task(_wait_for_disconnect(websocket, queue))
+    try:
+        message = None
+        while True:
+            if message is None:
+                tree_json, version = await current_tree_json(cache)
+                message = '{"op":"snapshot","version":%d,"tree":%s}' % (version, tree_json.decode())
+            await websocket.send_text(message)
+            message = await queue.get()
+            if message is _DISCONNECTED:
+                break
+    except Exception as e:
+        log.debug("/events connection ended: %s", e)
+    finally:
+        broadcaster.unsubscribe(queue)
+        if not disconnected.done():
+            # Ended by a send error or cancellation; reap the watcher
+            disconnected.cancel()
+            await asyncio.gather(disconnected, return_exceptions=True)
+        log.info("Client disconnected from /events")
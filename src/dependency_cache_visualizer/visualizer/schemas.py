@@ -1,16 +1,21 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 
 # --- Request Models ---
 
+# Paths travel as one '/'-delimited string, split once at the cache boundary
+# (see routes.split_path). A list of identifiers is still accepted for older
+# clients, and for identifiers that themselves contain '/'.
+PathField = Union[str, List[str]]
+
 class PathRequest(BaseModel):
-    """Request model containing just a path list."""
-    path: List[str] = Field(..., description="List of strings representing the node path.")
+    """Request model containing just a path."""
+    path: PathField = Field(..., description="Node path as an 'a/b/c' string (outer slashes ignored) or a list of strings; segments must be non-empty.")
 
 class PathDataRequest(BaseModel):
-    """Request model containing a path list and optional data."""
-    path: List[str] = Field(..., description="List of strings representing the node path.")
+    """Request model containing a path and optional data."""
+    path: PathField = Field(..., description="Node path as an 'a/b/c' string (outer slashes ignored) or a list of strings; segments must be non-empty.")
     data: Optional[Any] = Field(None, description="Data payload to add/update.")
 
 # --- Response Models ---
@@ -60,6 +65,10 @@ class StatsResponse(BaseModel):
     # Add calculated stats for convenience
     hit_ratio: Optional[float] = None
 
+    # Stats version of this snapshot; send it back as /stats?since= to get
+    # only the paths that changed afterwards
+    version: int = 0
+
     # Pydantic v2 validator example (or use root_validator in v1)
     # @model_validator(mode='after') # Pydantic v2
     # def calculate_hit_ratio(self) -> 'StatsResponse':
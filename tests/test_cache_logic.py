@@ -3,9 +3,11 @@ Placeholder tests for the core caching logic (DataCache, DependencyTree, Depende
 Requires pytest and potentially asyncio testing libraries (like pytest-asyncio).
 """
 
+import asyncio
+
 import pytest
-# from dependency_cache_visualizer.core.cache import DataCache
-# from dependency_cache_visualizer.core.node import DependencyNode
+from dependency_cache_visualizer.core.cache import DataCache
+from dependency_cache_visualizer.core.node import DependencyNode
 # from dependency_cache_visualizer.core.tree import DependencyTree
 # Import necessary testing utilities
 
@@ -107,4 +109,378 @@ async def test_error_handling(empty_cache):
 # - Circular dependencies (if detection is implemented)
 # - Cache clearing
 # - Parameterized computations
-# - Node serialization (to_dict)
\ No newline at end of file
+# - Node serialization (to_dict)
+
+
+# --- Node Hashing ---
+
+async def test_node_hash_ignores_dict_key_order():
+    """Tests that equal payloads hash identically regardless of key order."""
+    node_a = DependencyNode("a", data={"x": [1, 2.5, None], "y": "text"})
+    node_b = DependencyNode("b", data={"y": "text", "x": [1, 2.5, None]})
+    assert node_a.data_hash == node_b.data_hash
+
+async def test_node_hash_detects_changes():
+    """Tests that the hash changes with the payload and clears with it."""
+    node = DependencyNode("a", data={"values": [1, 2, 3]})
+    original_hash = node.data_hash
+    node.data = {"values": [1, 2, 4]}
+    assert node.data_hash != original_hash
+    assert DependencyNode("b", data=["ab"]).data_hash != DependencyNode("c", data=["a", "b"]).data_hash
+    node.data = None
+    assert node.data_hash is None
+
+
+# --- DataCache Statistics ---
+
+async def test_stats_track_hits_and_misses_per_path():
+    """Tests that global and per-path counters are updated consistently."""
+    cache = DataCache()
+    path = ["raw_data", "yahoo", "AAPL"]
+    assert await cache.get_data(path) is None
+    await cache.add_or_update_data(path, {"close": [1.0, 2.0]})
+    assert await cache.get_data(path) == {"close": [1.0, 2.0]}
+
+    stats = cache.get_stats()
+    assert (stats["gets"], stats["hits"], stats["misses"], stats["adds"]) == (2, 1, 1, 1)
+    assert stats["paths_checked"] == {"raw_data/yahoo/AAPL": 2}
+    assert stats["paths_hit"] == {"raw_data/yahoo/AAPL": 1}
+    assert stats["paths_missed"] == {"raw_data/yahoo/AAPL": 1}
+
+    cache.reset_stats()
+    assert cache.get_stats()["gets"] == 0
+
+
+# --- Invalidation ---
+
+async def test_invalidate_clears_subtree_only():
+    """Tests that invalidation drops a subtree's data but leaves siblings intact."""
+    cache = DataCache()
+    await cache.add_or_update_data(["a"], 1)
+    await cache.add_or_update_data(["a", "b"], 2)
+    await cache.add_or_update_data(["a", "b", "c"], 3)
+    await cache.add_or_update_data(["x"], 4)
+
+    await cache.invalidate(["a"])
+
+    assert await cache.get_data(["a"]) is None
+    assert await cache.get_data(["a", "b"]) is None
+    assert await cache.get_data(["a", "b", "c"]) is None
+    assert await cache.get_data(["x"]) == 4
+    node = cache.dependency_tree.get_node(["a"])
+    assert node is not None and node.children == {}
+
+
+# --- Read-Through Computation ---
+
+async def test_get_or_compute_coalesces_concurrent_misses():
+    """Tests that concurrent misses on one path run the producer only once."""
+    cache = DataCache()
+    calls = 0
+
+    async def produce():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": 42}
+
+    results = await asyncio.gather(*(cache.get_or_compute(["p"], produce) for _ in range(5)))
+    assert results == [{"value": 42}] * 5
+    assert calls == 1
+    assert await cache.get_or_compute(["p"], produce) == {"value": 42}
+    assert calls == 1
+
+async def test_get_or_compute_shares_errors():
+    """Tests that a failing producer raises for every waiting caller."""
+    cache = DataCache()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(
+        *(cache.get_or_compute(["p"], fail) for _ in range(3)), return_exceptions=True
+    )
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache._inflight == {}
+
+async def test_invalidate_credits_descendant_paths():
+    """Tests that per-path invalidation stats include every descendant."""
+    cache = DataCache()
+    await cache.add_or_update_data(["a", "b", "c"], 3)
+    await cache.add_or_update_data(["a", "d"], 4)
+    await cache.invalidate(["a"])
+    stats = cache.get_stats()
+    assert stats["invalidations"] == 1
+    assert stats["paths_invalidated"] == {"a": 1, "a/b": 1, "a/b/c": 1, "a/d": 1}
+
+async def test_stats_snapshot_is_read_only_and_refreshed():
+    """Tests that get_stats reuses its snapshot until a counter changes."""
+    cache = DataCache()
+    await cache.get_data(["a"])
+    first = cache.get_stats()
+    assert cache.get_stats() is first
+    with pytest.raises(TypeError):
+        first["gets"] = 0
+    await cache.get_data(["a"])
+    second = cache.get_stats()
+    assert second is not first
+    assert second["gets"] == 2 and second["paths_missed"] == {"a": 2}
+    cache.reset_stats()
+    assert cache.get_stats()["gets"] == 0
+
+async def test_get_many_and_add_or_update_many():
+    """Tests the batch lookup and store helpers."""
+    cache = DataCache()
+    await cache.add_or_update_many([(["a"], 1), (["b", "c"], 2)])
+    assert await cache.get_many([["a"], ["b", "c"], ["missing"]]) == [1, 2, None]
+    stats = cache.get_stats()
+    assert (stats["adds"], stats["hits"], stats["misses"]) == (2, 2, 1)
+    assert stats["hit_ratio"] == pytest.approx(200 / 3)
+
+async def test_remove_child_disposes_subtree():
+    """Tests that a removed subtree releases its payloads and links."""
+    parent = DependencyNode("parent")
+    child = DependencyNode("child", data=[1, 2, 3])
+    grandchild = DependencyNode("grandchild", data="x")
+    parent.add_child(child)
+    child.add_child(grandchild)
+
+    parent.remove_child("child")
+
+    assert parent.children == {}
+    assert child.parent is None and child.data is None and child.children == {}
+    assert grandchild.parent is None and grandchild.data is None
+
+
+# --- Tree Traversal ---
+
+async def test_get_subtree_nodes_breadth_first():
+    """Tests that subtree traversal visits every node in breadth-first order."""
+    cache = DataCache()
+    tree = cache.dependency_tree
+    await tree.add_or_update_node(["a", "b", "c"], 1)
+    await tree.add_or_update_node(["a", "d"], 2)
+    identifiers = [node.identifier for node in await tree.get_subtree_nodes()]
+    assert identifiers == ["root", "a", "b", "d", "c"]
+    identifiers = [node.identifier for node in await tree.get_subtree_nodes(["a", "b"])]
+    assert identifiers == ["b", "c"]
+    assert await tree.get_subtree_nodes(["missing"]) == []
+
+async def test_sibling_walks_survive_invalidation():
+    """Tests that the cached last-path walk never resolves to detached nodes."""
+    tree = DataCache().dependency_tree
+    await tree.add_or_update_node(["a", "b", "c"], 1)
+    await tree.add_or_update_node(["a", "b", "d"], 2)
+    assert tree.get_data(["a", "b", "c"]) == 1
+    assert tree.get_node(["a", "b", "x"]) is None
+
+    await tree.invalidate(["a"])
+    assert tree.get_node(["a", "b", "c"]) is None
+
+    node = await tree.add_or_update_node(["a", "b", "c"], 3)
+    assert tree.get_node(["a", "b", "c"]) is node
+    assert node.parent.parent is tree.get_node(["a"])
+
+async def test_cached_walk_sees_node_level_detaches():
+    """Tests that remove_child and overwriting add_child drop the cached walk."""
+    tree = DataCache().dependency_tree
+    await tree.add_or_update_node(["a", "b", "c"], 1)
+    assert tree.get_data(["a", "b", "c"]) == 1
+    tree.get_node(["a"]).remove_child("b")
+    assert tree.get_node(["a", "b", "c"]) is None
+
+    await tree.add_or_update_node(["x", "y"], 1)
+    assert tree.get_data(["x", "y"]) == 1
+    tree.get_node(["x"]).add_child(DependencyNode("y", data=99))
+    assert tree.get_data(["x", "y"]) == 99
+
+async def test_update_rewalks_when_target_was_detached():
+    """Tests that add_or_update_data never writes onto a node outside the tree."""
+    cache = DataCache()
+    tree = cache.dependency_tree
+    await cache.add_or_update_data(["a", "b", "c"], 1)
+    tree.get_node(["a"]).remove_child("b")
+    await cache.add_or_update_data(["a", "b", "c"], 2)
+    assert await cache.get_data(["a", "b", "c"]) == 2
+
+    # Detached without going through a node method, so no version is bumped
+    del tree.get_node(["a"]).children["b"]
+    node = await tree.add_or_update_node(["a", "b", "c"], 3)
+    assert tree.get_node(["a", "b"]).children["c"] is node
+    assert tree.root.children["a"].children["b"].children["c"].data == 3
+
+async def test_rwlock_readers_share_and_writer_excludes():
+    """Tests that readers overlap while a writer waits for them to drain."""
+    lock = DataCache().dependency_tree._lock
+    events = []
+
+    async def reader(name):
+        async with lock.reader_lock:
+            events.append(f"{name}+")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}-")
+
+    async def writer():
+        await asyncio.sleep(0.001)
+        async with lock.writer_lock:
+            events.append("w")
+
+    await asyncio.gather(reader("r1"), reader("r2"), writer())
+    assert events[:2] == ["r1+", "r2+"]
+    assert events[-1] == "w"
+
+async def test_rwlock_cancelled_release_still_releases():
+    """Tests that cancelling a release stuck on the condition's lock cannot wedge writers."""
+    lock = DataCache().dependency_tree._lock
+    await lock.reader_lock.__aenter__()
+    async with lock._cond: # Make the release wait for the condition's lock
+        release = asyncio.create_task(lock.reader_lock.__aexit__(None, None, None))
+        await asyncio.sleep(0)
+        release.cancel()
+        await asyncio.sleep(0)
+    await asyncio.wait_for(lock.writer_lock.__aenter__(), timeout=1)
+    await lock.writer_lock.__aexit__(None, None, None)
+
+async def test_empty_path_reads_resolve_to_root():
+    """Tests that empty-path reads return the root without walking."""
+    tree = DataCache().dependency_tree
+    assert tree.get_node([]) is tree.root
+    assert tree.get_data([]) is None
+    assert await tree.invalidate([]) == []
+
+async def test_update_rewalks_after_concurrent_invalidation():
+    """Tests that an update waiting on the lock re-walks a pruned path."""
+    tree = DataCache().dependency_tree
+    await tree.add_or_update_node(["a", "b"], 1)
+
+    async with tree._lock.writer_lock:
+        # Walks (and finds a/b) now, then queues behind the held lock
+        update = asyncio.create_task(tree.add_or_update_node(["a", "b"], 2))
+        await asyncio.sleep(0)
+        tree.root.children["a"]._invalidate_tree_sync()
+
+    node = await update
+    assert tree.get_node(["a", "b"]) is node
+    assert node.data == 2
+
+async def test_tree_add_or_update_many_batches_in_path_order():
+    """Tests that a batch insert stores every item and lets the last duplicate win."""
+    tree = DataCache().dependency_tree
+    nodes = await tree.add_or_update_many(
+        [(["a", "y"], 1), (["a", "x"], 2), ([], 3), (["a", "y"], 4)]
+    )
+    assert [node.identifier for node in nodes] == ["x", "y", "y"]
+    assert tree.get_data(["a", "x"]) == 2
+    assert tree.get_data(["a", "y"]) == 4
+
+    # List and tuple paths may be mixed in one batch
+    nodes = await tree.add_or_update_many([(("a", "z"), 5), (["a", "w"], 6)])
+    assert [node.identifier for node in nodes] == ["w", "z"]
+
+async def test_writes_discard_memoized_serialization_up_to_root():
+    """Tests that a write clears the memoized serialization of its ancestors only."""
+    tree = DataCache().dependency_tree
+    await tree.add_or_update_node(["a", "b"], 1)
+    await tree.add_or_update_node(["c"], 2)
+    for node in await tree.get_subtree_nodes():
+        node.serialized = {}
+
+    await tree.add_or_update_node(["a", "b"], 3)
+    assert tree.get_node(["a", "b"]).serialized is None
+    assert tree.get_node(["a"]).serialized is None
+    assert tree.root.serialized is None
+    assert tree.get_node(["c"]).serialized == {}
+
+    tree.get_node(["c"]).serialized = tree.root.serialized = {}
+    await tree.add_or_update_node(["c", "d"], 4)
+    assert tree.get_node(["c"]).serialized is None and tree.root.serialized is None
+
+async def test_get_stats_since_lists_only_changed_paths():
+    """Tests that stats diffs cover paths updated after a version, and resets."""
+    cache = DataCache()
+    await cache.add_or_update_data(["a"], 1)
+    await cache.add_or_update_data(["b"], 2)
+    version = cache.get_stats()["version"]
+    await cache.get_data(["b"])
+
+    diff = cache.get_stats(since=version)
+    assert diff["paths_checked"] == {"b": 1}
+    assert diff["paths_added"] == {"b": 1}
+    assert diff["gets"] == 1
+
+    cache.reset_stats()
+    # A version from before the reset gets the full (now empty) snapshot
+    assert cache.get_stats(since=version) is cache.get_stats()
+
+    # A version from another (e.g. pre-restart) instance is ahead of this one
+    fresh = DataCache()
+    await fresh.get_data(["b"])
+    stats = fresh.get_stats(since=50)
+    assert stats["paths_checked"] == {"b": 1}
+    assert stats is fresh.get_stats()
+
+async def test_listeners_see_each_mutation():
+    """Tests that listeners are called per stored item, invalidation and reset."""
+    cache = DataCache()
+    events = []
+    listener = lambda op, path, node: events.append((op, list(path), node and node.data))
+    cache.add_listener(listener)
+    await cache.add_or_update_data(["a", "b"], 1)
+    await cache.add_or_update_many([(["c"], 3), (["a", "d"], 2)])
+    await cache.invalidate(["a"])
+    cache.reset_stats()
+    assert events == [
+        ("add", ["a", "b"], 1),
+        ("add", ["a", "d"], 2),
+        ("add", ["c"], 3),
+        ("invalidate", ["a"], None),
+        ("reset_stats", [], None),
+    ]
+
+    cache.remove_listener(listener)
+    await cache.add_or_update_data(["e"], 5)
+    assert len(events) == 5
+
+async def test_async_listeners_run_concurrently():
+    """Tests that async listener calls are gathered, and their errors contained."""
+    cache = DataCache()
+    calls = []
+
+    async def slow_listener(op, path, node):
+        await asyncio.sleep(0.05)
+        calls.append((op, path))
+
+    async def failing_listener(op, path, node):
+        raise RuntimeError("listener failure")
+
+    cache.add_listener(slow_listener)
+    cache.add_listener(slow_listener)
+    cache.add_listener(failing_listener)
+    await cache.add_or_update_many([(["a", "b"], 1), (["a", "c"], 2)])
+    calls.clear()
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await cache.invalidate(["a"])
+    # Run one after another, the two 50ms listeners would take 100ms
+    assert loop.time() - start < 0.09
+    assert calls == [("invalidate", ["a"])] * 2
+    assert cache.get_stats()["invalidations"] == 1
+
+async def test_reset_stats_off_loop_skips_async_listeners():
+    """Tests that reset_stats works without a running loop when async listeners exist."""
+    cache = DataCache()
+    calls = []
+
+    async def listener(op, path, node):
+        calls.append(op)
+
+    cache.add_listener(listener)
+    # A worker thread has no running event loop
+    await asyncio.get_running_loop().run_in_executor(None, cache.reset_stats)
+    assert calls == []
+
+    cache.reset_stats()
+    await asyncio.gather(*cache._listener_tasks)
+    assert calls == ["reset_stats"]
@@ -3,8 +3,18 @@ Placeholder tests for the visualizer's FastAPI backend API endpoints.
 Requires pytest, httpx, and pytest-asyncio.
 """
 
+import asyncio
+
 import pytest
-from httpx import AsyncClient
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from starlette.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from dependency_cache_visualizer.core import DataCache, DependencyNode
+from dependency_cache_visualizer.visualizer.app import create_app, app_state
+from dependency_cache_visualizer.visualizer.routes import _broadcasters, serialize_node
+from dependency_cache_visualizer.visualizer.schemas import TreeResponse
 
 # Import the FastAPI app factory (adjust path if needed)
 # from dependency_cache_visualizer.visualizer.app import create_app
@@ -107,4 +117,266 @@ async def test_get_static_asset(client):
 
 # Add tests for other endpoints if implemented:
 # - POST /api/clear
-# - GET /api/node/{node_name}
\ No newline at end of file
+# - GET /api/node/{node_name}
+
+
+# --- Tests Against a Live DataCache ---
+
+@pytest.fixture
+def live_cache():
+    """Provides a real DataCache registered as the visualizer's cache instance."""
+    cache = DataCache()
+    app_state["cache_instance"] = cache
+    yield cache
+    app_state["cache_instance"] = None
+
+@pytest_asyncio.fixture
+async def live_client(live_cache):
+    """Provides an async client bound to an app serving live_cache."""
+    transport = ASGITransport(app=create_app())
+    async with AsyncClient(transport=transport, base_url="http://testserver") as test_client:
+        yield test_client
+
+async def test_tree_reflects_cache_contents(live_cache, live_client):
+    """Tests that /api/tree serializes nodes, hashes and children."""
+    await live_cache.add_or_update_data(["raw_data", "AAPL"], {"close": [1.0]})
+    response = await live_client.get("/api/tree")
+    assert response.status_code == 200
+    root = response.json()
+    assert root["identifier"] == "root"
+    raw_data = root["children"]["raw_data"]
+    assert raw_data["has_data"] is False
+    leaf = raw_data["children"]["AAPL"]
+    assert leaf["has_data"] is True
+    assert len(leaf["data_hash"]) == 16
+    assert leaf["timestamp"] is not None
+
+async def test_tree_reflects_writes_between_requests(live_cache, live_client):
+    """Tests that memoized tree serialization picks up later writes and invalidations."""
+    await live_cache.add_or_update_data(["a", "b"], 1)
+    await live_cache.add_or_update_data(["c"], 2)
+    first = (await live_client.get("/api/tree")).json()
+    await live_cache.add_or_update_data(["a", "d"], 3)
+    await live_cache.invalidate(["c"])
+    second = (await live_client.get("/api/tree")).json()
+    assert set(first["children"]["a"]["children"]) == {"b"}
+    assert set(second["children"]["a"]["children"]) == {"b", "d"}
+    assert second["children"]["c"]["has_data"] is False
+    assert second["children"]["a"]["children"]["b"] == first["children"]["a"]["children"]["b"]
+
+async def test_tree_reflects_node_level_detaches(live_cache, live_client):
+    """Tests that cached /tree bytes are not reused after a node-level detach."""
+    await live_cache.add_or_update_data(["a", "b"], 1)
+    assert "b" in (await live_client.get("/api/tree")).json()["children"]["a"]["children"]
+    etag = (await live_client.get("/api/tree")).headers["etag"]
+    live_cache.dependency_tree.get_node(["a"]).remove_child("b")
+    response = await live_client.get("/api/tree", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["children"]["a"]["children"] == {}
+
+async def test_tree_payload_matches_response_schema(live_cache, live_client):
+    """Tests that the hand-built /api/tree JSON is exactly what TreeResponse would emit."""
+    pydantic = pytest.importorskip("pydantic")
+    if not hasattr(pydantic, "TypeAdapter"):
+        pytest.skip("TypeAdapter requires Pydantic v2")
+    await live_cache.add_or_update_many([(["a", "b"], {"x": 1}), (["c"], None), (["d"], [1, 2])])
+    response = await live_client.get("/api/tree")
+    # One validation pass over the whole payload, as the docs' schema describes it
+    model = pydantic.TypeAdapter(TreeResponse).validate_json(response.content)
+    assert model.model_dump(mode="json") == response.json()
+
+async def test_tree_etag_short_circuits_unchanged_polls(live_cache, live_client):
+    """Tests that /api/tree answers 304 until the tree changes."""
+    await live_cache.add_or_update_data(["a"], 1)
+    response = await live_client.get("/api/tree")
+    etag = response.headers["etag"]
+    response = await live_client.get("/api/tree", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    await live_cache.invalidate(["a"])
+    response = await live_client.get("/api/tree", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+    etag = response.headers["etag"]
+    for header in (f'"other", W/{etag}', "*", f'{etag}, "other"'):
+        response = await live_client.get("/api/tree", headers={"If-None-Match": header})
+        assert response.status_code == 304
+    response = await live_client.get("/api/tree", headers={"If-None-Match": '"other", W/"x"'})
+    assert response.status_code == 200
+
+async def test_serialize_node_handles_deep_trees():
+    """Tests that serialization is iterative and reuses memoized subtrees."""
+    cache = DataCache()
+    path = [f"n{i}" for i in range(3000)]
+    await cache.add_or_update_data(path, 1)
+    node = serialize_node(cache.dependency_tree.root)
+    for identifier in path:
+        node = node["children"][identifier]
+    assert node["has_data"] is True
+    assert serialize_node(cache.dependency_tree.root) is cache.dependency_tree.root.serialized
+
+async def test_large_tree_renders_off_loop(live_cache, live_client):
+    """Tests node counting and /api/tree for trees rendered on a worker thread."""
+    await live_cache.add_or_update_many(([f"g{i // 100}", f"n{i}"], i) for i in range(600))
+    tree = live_cache.dependency_tree
+    assert tree.node_count == 1 + 6 + 600
+    response = await live_client.get("/api/tree")
+    assert response.status_code == 200
+    assert response.json()["children"]["g5"]["children"]["n599"]["has_data"] is True
+    await live_cache.invalidate(["g0"])
+    assert tree.node_count == 1 + 6 + 500
+
+async def test_tree_responses_are_compressed(live_cache, live_client):
+    """Tests that large /api/tree payloads are gzipped for clients that accept it."""
+    await live_cache.add_or_update_many(([f"n{i}"], i) for i in range(100))
+    response = await live_client.get("/api/tree", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()["children"]) == 100
+    response = await live_client.get("/api/stats", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+async def test_routes_read_cache_from_app_state(live_cache):
+    """Tests that routes use app.state.cache and fail cleanly without one."""
+    app = create_app()
+    other = DataCache()
+    await other.add_or_update_data(["swapped"], 1)
+    app.state.cache = other
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        tree = (await client.get("/api/tree")).json()
+        assert set(tree["children"]) == {"swapped"}
+        app.state.cache = None
+        assert (await client.get("/api/stats")).status_code == 500
+
+async def test_get_data_round_trip(live_client):
+    """Tests adding data through the API and reading it back."""
+    response = await live_client.post("/api/add-data", json={"path": ["a", "b"], "data": {"x": 1}})
+    assert response.status_code == 200
+    response = await live_client.post("/api/get-data", json={"path": ["a", "b"]})
+    body = response.json()
+    assert body["node_exists"] is True
+    assert body["data"] == {"x": 1}
+    assert len(body["data_hash"]) == 16
+    response = await live_client.post("/api/get-data", json={"path": ["missing"]})
+    assert response.json()["node_exists"] is False
+
+async def test_get_data_lookups_follow_detaches(live_cache, live_client):
+    """Tests that memoized node lookups are dropped once nodes leave the tree."""
+    await live_cache.add_or_update_data(["a", "b"], 1)
+    response = await live_client.post("/api/get-data", json={"path": ["a", "b"]})
+    assert response.json()["node_exists"] is True
+    assert ("a", "b") in live_cache.node_lookups
+
+    # A node-level detach does not move the tree version
+    live_cache.dependency_tree.get_node(["a"]).remove_child("b")
+    response = await live_client.post("/api/get-data", json={"path": ["a", "b"]})
+    assert response.json()["node_exists"] is False
+
+    # Nor does a plain attach, so misses must not be memoized
+    response = await live_client.post("/api/get-data", json={"path": "a/z"})
+    assert response.json()["node_exists"] is False
+    live_cache.dependency_tree.get_node(["a"]).add_child(DependencyNode("z", data=3))
+    response = await live_client.post("/api/get-data", json={"path": "a/z"})
+    assert response.json()["node_exists"] is True
+
+async def test_get_data_encodes_non_json_payloads(live_cache, live_client):
+    """Tests that /api/get-data still encodes payloads orjson cannot handle natively."""
+    await live_cache.add_or_update_data(["x"], {"tags": {"a"}, 3: "k"})
+    response = await live_client.post("/api/get-data", json={"path": ["x"]})
+    assert response.status_code == 200
+    assert response.json()["data"] == {"tags": ["a"], "3": "k"}
+
+async def test_get_data_falls_back_for_payloads_orjson_would_alter(live_cache, live_client):
+    """Tests that big ints round-trip and NaN is refused, as before orjson."""
+    await live_client.post("/api/add-data", json={"path": "big", "data": {"x": 2**70}})
+    response = await live_client.post("/api/get-data", json={"path": "big"})
+    assert response.status_code == 200
+    assert response.json()["data"] == {"x": 2**70}
+
+    await live_cache.add_or_update_data(["nan"], [1.0, float("nan")])
+    response = await live_client.post("/api/get-data", json={"path": "nan"})
+    assert response.status_code == 500
+
+async def test_paths_accept_strings_and_lists(live_client):
+    """Tests that request paths may be '/'-delimited strings or identifier lists."""
+    await live_client.post("/api/add-data", json={"path": "a/b", "data": 1})
+    body = (await live_client.post("/api/get-data", json={"path": ["a", "b"]})).json()
+    assert body["path"] == ["a", "b"] and body["data"] == 1
+    body = (await live_client.post("/api/get-data", json={"path": "a/b"})).json()
+    assert body["data"] == 1
+    response = await live_client.post("/api/invalidate", json={"path": ""})
+    assert response.status_code == 400
+
+async def test_string_paths_ignore_outer_slashes_and_reject_empty_segments(live_client):
+    """Tests '/a/b/' normalization and 400s for paths with empty segments."""
+    response = await live_client.post("/api/add-data", json={"path": "/a/b/", "data": 1})
+    assert response.status_code == 200
+    body = (await live_client.post("/api/get-data", json={"path": "a/b"})).json()
+    assert body["node_exists"] is True and body["data"] == 1
+    for path in ("a//b", ["a", ""]):
+        response = await live_client.post("/api/add-data", json={"path": path, "data": 2})
+        assert response.status_code == 400
+    assert (await live_client.post("/api/get-data", json={"path": "a//b"})).status_code == 400
+
+async def test_invalidate_and_stats(live_client):
+    """Tests invalidation and the stats endpoint."""
+    await live_client.post("/api/add-data", json={"path": ["a"], "data": 1})
+    response = await live_client.post("/api/invalidate", json={"path": ["a"]})
+    assert response.json() == {"message": "Cache path invalidated successfully"}
+    response = await live_client.get("/api/stats")
+    stats = response.json()
+    assert stats["adds"] == 1
+    assert stats["invalidations"] == 1
+    assert stats["paths_invalidated"] == {"a": 1}
+    assert stats["hit_ratio"] is None
+
+async def test_events_stream_snapshot_then_changes(live_cache):
+    """Tests that /api/events sends a tree snapshot, then one message per mutation."""
+    await live_cache.add_or_update_data(["a"], 1)
+    with TestClient(create_app()) as client:
+        with client.websocket_connect("/api/events") as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["op"] == "snapshot"
+            assert snapshot["version"] == live_cache.version
+            assert set(snapshot["tree"]["children"]) == {"a"}
+
+            # Mutate on the app's event loop, where the client queues live
+            client.portal.call(live_cache.add_or_update_data, ["a", "b"], 2)
+            event = websocket.receive_json()
+            assert event["op"] == "add" and event["path"] == ["a", "b"]
+            assert event["version"] == live_cache.version
+            assert event["data_hash"] is not None and event["timestamp"]
+
+            client.portal.call(live_cache.invalidate, ["a"])
+            assert websocket.receive_json()["op"] == "invalidate"
+
+            # Off the app's loop, from a thread with no event loop at all
+            await asyncio.get_running_loop().run_in_executor(None, live_cache.reset_stats)
+            assert websocket.receive_json()["op"] == "reset_stats"
+        assert live_cache not in _broadcasters
+
+async def test_events_refuses_connections_without_cache():
+    """Tests that /api/events closes with 1011 when no cache is set."""
+    app = create_app()
+    app.state.cache = None
+    with TestClient(app) as client:
+        with pytest.raises(WebSocketDisconnect) as excinfo:
+            with client.websocket_connect("/api/events"):
+                pass
+    assert excinfo.value.code == 1011
+
+async def test_spa_deep_links_serve_index_from_memory(tmp_path, live_cache):
+    """Tests that deep links get index.html (with an ETag) while files and /api 404s stay intact."""
+    (tmp_path / "index.html").write_text("<html>spa</html>")
+    (tmp_path / "app.js").write_text("console.log(1)")
+    app = create_app(frontend_build_dir=tmp_path)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://testserver") as client:
+        response = await client.get("/some/deep/link")
+        assert response.status_code == 200
+        assert response.text == "<html>spa</html>"
+        etag = response.headers["etag"]
+        response = await client.get("/other/link", headers={"If-None-Match": f"W/{etag}"})
+        assert response.status_code == 304
+        assert (await client.get("/app.js")).text == "console.log(1)"
+        assert (await client.get("/")).text == "<html>spa</html>"
+        assert (await client.get("/api/no-such-route")).status_code == 404
+        assert (await client.get("/api/stats")).status_code == 200